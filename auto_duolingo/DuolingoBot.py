@@ -1,16 +1,21 @@
 import time
-import xml.etree.ElementTree as ET
+from typing import Callable, List, Optional, Tuple
 
-from auto_duolingo.constants import QuestionType
+from auto_duolingo.constants import QuestionType, ScreenState
+from auto_duolingo.latency import latency
 from auto_duolingo.logger import log_incorrect_answer
 from auto_duolingo.question_answer import (
     solve_matching_pairs,
     solve_translate_sentence,
     solve_translate_word,
+    solve_with_cache,
     solve_word_pronunciation,
 )
+from auto_duolingo.ui_helper.Bounds import Bounds
 from auto_duolingo.ui_helper.constants import BTN_HINT_TEXT
 from auto_duolingo.ui_helper.DuolingoUIHelper import DuolingoUIHelper
+from auto_duolingo.ui_helper.ScreenClassifier import classify_screen
+from auto_duolingo.ui_helper.ScreenSnapshot import ScreenSnapshot
 from auto_duolingo.ui_helper.ui_info_extractor import (
     detect_question_type,
     extract_alternative_options,
@@ -23,16 +28,16 @@ from auto_duolingo.ui_helper.ui_info_extractor import (
     extract_question_stem_text,
     extract_selected_options,
     get_answer_status,
-    get_continue_button_bounds,
-    is_app_launched,
     is_element_present,
-    is_in_no_hearts_screen,
-    is_in_question_screen,
-    is_in_unit_selection_screen,
     is_in_word_match_madness_screen,
     is_listening_question,
 )
-from db.SentencePairDB import SentencePairDB
+from auto_duolingo.write_behind import WriteBehind
+from db.ConnectionManager import ConnectionManager
+
+# Act again on a screen that has not changed this many seconds after the
+# last action, in case the tap was lost
+STABLE_SCREEN_RETRY_AFTER = 3.0
 
 
 class DuolingoBot:
@@ -40,11 +45,46 @@ class DuolingoBot:
     A bot for automating tasks in the Duolingo app.
     """
 
-    def __init__(self):
+    def __init__(self, device=None, stats_path: Optional[str] = None,
+                 read_only: bool = False, databases: Optional[ConnectionManager] = None,
+                 snapshot_path: Optional[str] = None, fuzzy_search: bool = False):
         self.state = "START"
-        self.ui_helper = DuolingoUIHelper()
+        # With read_only, answers seen on result screens are not saved. A
+        # snapshot answers from a mapped file and implies read_only.
+        # fuzzy_search adds the trigram tier to sentence lookups
+        self.databases = databases or ConnectionManager(
+            read_only=read_only, snapshot_path=snapshot_path, fuzzy_search=fuzzy_search)
+        self._owns_databases = databases is None
+        # Answers seen on result screens are saved and logged off the UI loop
+        self.writer = WriteBehind(
+            lambda: ConnectionManager(
+                self.databases.db_name, data_folder=self.databases.data_folder),
+            index_sentence_pair=lambda original, translated:
+                self.databases.sentence_pair_db().index_sentence_pair(original, translated))
+        # Per-stage timings are written here periodically and on exit
+        latency.json_path = stats_path
+        self.ui_helper = DuolingoUIHelper(device)
+        # Fingerprint of the last cached answer, graded on the result screen
+        self._ungraded_answer: Optional[str] = None
+
+    def _click_and_submit(self, bounds_to_click: List[Bounds], submit: bool = True):
+        self.ui_helper.perform_clicks_by_bounds(bounds_to_click)
+        if submit:
+            self.ui_helper.click_submit_button()
+
+    def _solve(self, question_type: QuestionType, prompt: str, options_with_bounds: List[Tuple[str, Bounds]],
+               solve: Callable[[], List[Bounds]]) -> List[Bounds]:
+        bounds_to_click, self._ungraded_answer = solve_with_cache(
+            question_type.name, prompt, options_with_bounds, solve, self.databases.answer_cache())
+        return bounds_to_click
 
-    def answer_question(self, tree: ET.ElementTree):
+    def _grade_answer(self, result):
+        if self._ungraded_answer is not None and result["status"] != "unknown":
+            self.databases.answer_cache().record_status(
+                self._ungraded_answer, result["status"])
+            self._ungraded_answer = None
+
+    def answer_question(self, tree: ScreenSnapshot):
         if is_listening_question(tree):
             print("Listening question detected, skipping...")
             self.ui_helper.skip_listening_question()
@@ -65,94 +105,141 @@ class DuolingoBot:
             print("Unknown question type. Skipping...")
             return
 
+        with latency.question(question_type.name):
+            self._answer_question_of_type(
+                tree, question_type, is_continuous_mode)
+
+    def _answer_question_of_type(self, tree: ScreenSnapshot, question_type: QuestionType, is_continuous_mode: bool):
         if question_type == QuestionType.CHOOSE_CORRECT_TRANSLATION:
             word = extract_origin_sentence(tree)
             options = extract_option_list_of_word_translation(tree)
-            bounds_to_click = solve_translate_word(word, options)
-            self.ui_helper.perform_clicks_by_bounds(bounds_to_click)
-            self.ui_helper.click_submit_button()
+            with latency.measure("solve"):
+                bounds_to_click = self._solve(question_type, word, options, lambda: solve_translate_word(
+                    word, options, self.databases.word_pairs_db()))
+            self._click_and_submit(bounds_to_click)
 
         if question_type == QuestionType.CHOOSE_CORRECT_PICTURE:
             word = extract_origin_sentence(tree)
             options = extract_option_list_of_images(tree)
-            bounds_to_click = solve_translate_word(word, options)
-            self.ui_helper.perform_clicks_by_bounds(bounds_to_click)
-            self.ui_helper.click_submit_button()
+            with latency.measure("solve"):
+                bounds_to_click = self._solve(question_type, word, options, lambda: solve_translate_word(
+                    word, options, self.databases.word_pairs_db()))
+            self._click_and_submit(bounds_to_click)
 
         if question_type == QuestionType.CHOOSE_MATCHING_PAIR:
             words, options = extract_matching_pairs(tree)
-            bounds_to_click = solve_matching_pairs(
-                words, options, disable_inference=is_continuous_mode
-            )
-            self.ui_helper.perform_clicks_by_bounds(bounds_to_click)
+            # Not cached: the pairs screen has no result to grade an answer by
+            with latency.measure("solve"):
+                bounds_to_click = solve_matching_pairs(
+                    words, options, disable_inference=is_continuous_mode,
+                    word_pairs_db=self.databases.word_pairs_db()
+                )
+            self._click_and_submit(bounds_to_click, submit=False)
 
         if question_type == QuestionType.TRANSLATE_SENTENCE:
             if is_element_present(tree, BTN_HINT_TEXT):
-                self.ui_helper.click_element_if_exists([BTN_HINT_TEXT])
+                self.ui_helper.click_element_if_exists([BTN_HINT_TEXT], tree)
             sentence = extract_origin_sentence(tree)
             words = extract_alternative_options(tree)
-            bounds_to_click = solve_translate_sentence(sentence, words)
+            with latency.measure("solve"):
+                bounds_to_click = self._solve(question_type, sentence, words, lambda: solve_translate_sentence(
+                    sentence, words, self.databases.sentence_pair_db()))
             self.ui_helper.perform_clicks_by_bounds(bounds_to_click)
             if not bounds_to_click and words:
                 # If bounds_to_click is empty, submit directly to skip the question.
                 self.ui_helper.perform_clicks_by_bounds([words[0][1]])
             self.ui_helper.click_submit_button()
 
-            self.ui_helper.wait_answer_result()
-            newTree = self.ui_helper.get_current_screen()
+            with latency.measure("result_wait"):
+                newTree = self.ui_helper.wait_answer_result()
+            if newTree is None:
+                newTree = self.ui_helper.get_current_screen()
             result = get_answer_status(newTree)
-            if result.get("original_sentence") and result.get("correct_answer"):
-                SentencePairDB().insert_sentence_pair(
+            self._grade_answer(result)
+            if (not self.databases.read_only
+                    and result.get("original_sentence") and result.get("correct_answer")):
+                self.writer.insert_sentence_pair(
                     result["original_sentence"], result["correct_answer"]
                 )
             if bounds_to_click and result["status"] == "incorrect":
-                log_incorrect_answer(result)
+                self.writer.call(log_incorrect_answer, result)
 
         if question_type == QuestionType.HOW_TO_PRONOUNCE:
             word = extract_flashcard_text(tree)
             options = extract_option_list_of_word_translation(tree)
-            bounds_to_click = solve_word_pronunciation(word, options)
-            self.ui_helper.perform_clicks_by_bounds(bounds_to_click)
-            self.ui_helper.click_submit_button()
+            with latency.measure("solve"):
+                bounds_to_click = self._solve(question_type, word, options, lambda: solve_word_pronunciation(
+                    word, options, self.databases.word_pairs_db()))
+            self._click_and_submit(bounds_to_click)
 
         if question_type == QuestionType.CHOOSE_CORRECT_CHARACTER:
             word = extract_question_stem_text(tree)
             options = extract_option_list_of_scaled_text(tree)
-            bounds_to_click = solve_word_pronunciation(word, options)
-            self.ui_helper.perform_clicks_by_bounds(bounds_to_click)
-            self.ui_helper.click_submit_button()
+            with latency.measure("solve"):
+                bounds_to_click = self._solve(question_type, word, options, lambda: solve_word_pronunciation(
+                    word, options, self.databases.word_pairs_db()))
+            self._click_and_submit(bounds_to_click)
 
     def run(self):
         print("Bot started running.")
-        while True:
-            tree = self.ui_helper.get_current_screen()
-            continue_button_bounds = get_continue_button_bounds(tree)
-
-            if not is_app_launched(tree):
-                print("App is not launched. Launching app...")
-                self.ui_helper.launch_app()
-
-            elif continue_button_bounds:
-                print("Waiting for continue button. Clicking continue button...")
-                self.ui_helper.perform_clicks_by_bounds(
-                    [continue_button_bounds])
-
-            elif is_in_unit_selection_screen(tree):
-                print("In unit selection screen. Selecting unit...")
-                self.ui_helper.select_unit()
-
-            elif is_in_question_screen(tree):
-                print("In question screen. Answering question...")
-                self.answer_question(tree)
-
-            elif is_in_no_hearts_screen(tree):
-                print("No hearts.")
-                self.state = "END"
-
-            else:
-                print("Unknown state. Resting for 1 second...")
-                time.sleep(1)
-
-            if self.state == "END":
-                break
+        try:
+            last_tree = None
+            last_action_time = time.monotonic()
+            while True:
+                tree = self.ui_helper.get_current_screen()
+                # The helper hands out the same snapshot while the dump does
+                # not change, so this is the screen we already acted on
+                if (tree is last_tree
+                        and time.monotonic() - last_action_time < STABLE_SCREEN_RETRY_AFTER):
+                    # Still animating or waiting on the server
+                    time.sleep(self.ui_helper.stable_screen_delay())
+                    continue
+
+                if tree is not last_tree:
+                    parse_seconds = tree.parse_seconds
+                    start = time.perf_counter()
+                    state, bounds, _ = classify_screen(tree)
+                    # Parsing triggered by the classifier is counted as parse
+                    latency.record("classify", time.perf_counter() - start
+                                   - (tree.parse_seconds - parse_seconds))
+                    last_tree = tree
+
+                if state == ScreenState.APP_NOT_LAUNCHED:
+                    print("App is not launched. Launching app...")
+                    self.ui_helper.launch_app()
+
+                elif state == ScreenState.CONTINUE:
+                    print("Waiting for continue button. Clicking continue button...")
+                    if self._ungraded_answer is not None:
+                        self._grade_answer(get_answer_status(tree))
+                    self._click_and_submit([bounds], submit=False)
+
+                elif state == ScreenState.UNIT_SELECTION:
+                    print("In unit selection screen. Selecting unit...")
+                    self.ui_helper.select_unit(tree)
+
+                elif state == ScreenState.QUESTION:
+                    print("In question screen. Answering question...")
+                    self.answer_question(tree)
+
+                elif state == ScreenState.NO_HEARTS:
+                    print("No hearts.")
+                    self.state = "END"
+
+                else:
+                    delay = self.ui_helper.stable_screen_delay()
+                    print(f"Unknown state. Resting for {delay:.1f} seconds...")
+                    time.sleep(delay)
+                last_action_time = time.monotonic()
+                latency.maybe_flush()
+
+                if self.state == "END":
+                    break
+        finally:
+            self.ui_helper.record_parse()
+            self.writer.close()
+            if self._owns_databases:
+                self.databases.close()
+            print(latency.format_summary())
+            latency.write_json()
         print("Bot finished running.")
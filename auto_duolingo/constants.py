@@ -14,4 +14,18 @@ class QuestionType(Enum):
     # "这个怎么读？"
     HOW_TO_PRONOUNCE = 6
     # "选择 “xxxx” 对应的字符", 一个平假名单词, 四个汉字选项选择一个
-    CHOOSE_CORRECT_CHARACTER = 7
\ No newline at end of file
+    CHOOSE_CORRECT_CHARACTER = 7
+
+
+class ScreenState(Enum):
+    UNKNOWN = 0
+    # 多邻国未在前台
+    APP_NOT_LAUNCHED = 1
+    # 有 "继续" / "不，谢谢" 等需要直接点掉的按钮
+    CONTINUE = 2
+    # 课程单元选择
+    UNIT_SELECTION = 3
+    # 答题中
+    QUESTION = 4
+    # 红心用完
+    NO_HEARTS = 5
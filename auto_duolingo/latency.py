@@ -0,0 +1,141 @@
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+# Upper bounds of the histogram buckets, in milliseconds
+BUCKET_BOUNDS_MS = [1, 2, 5, 10, 20, 50, 100, 200,
+                    500, 1000, 2000, 5000, 10000, 30000]
+
+
+class StageHistogram:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        # One extra bucket for everything above the last bound
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(
+            BUCKET_BOUNDS_MS, seconds * 1000)] += 1
+
+    def percentile_ms(self, fraction: float) -> float:
+        """
+        Estimate of the given percentile, interpolated linearly inside the
+        bucket that holds it. The last bucket is taken to end at the maximum.
+        """
+        target = fraction * self.count
+        max_ms = self.max * 1000
+        seen = 0
+        lower = 0.0
+        for upper, count in zip(BUCKET_BOUNDS_MS + [max_ms], self.buckets):
+            if count and seen + count >= target:
+                upper = min(upper, max_ms)
+                return lower + (upper - lower) * (target - seen) / count
+            seen += count
+            lower = upper
+        return max_ms
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 2) if self.count else 0,
+            "p50_ms": round(self.percentile_ms(0.5), 2),
+            "p90_ms": round(self.percentile_ms(0.9), 2),
+            "p99_ms": round(self.percentile_ms(0.99), 2),
+            "max_ms": round(self.max * 1000, 2),
+            "buckets_ms": {
+                (f"<={bound}" if i < len(BUCKET_BOUNDS_MS) else f">{BUCKET_BOUNDS_MS[-1]}"): count
+                for i, (bound, count) in enumerate(zip(BUCKET_BOUNDS_MS + [None], self.buckets))
+                if count
+            },
+        }
+
+
+class LatencyRecorder:
+    """
+    Collects wall time per stage of the bot loop (dump, parse, classify,
+    solve, taps, result wait, ...). Each sample is counted under the stage
+    and, while a question is being answered, under its question type too.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, StageHistogram] = {}
+        self._by_question_type: Dict[str, Dict[str, StageHistogram]] = {}
+        self.question_type: Optional[str] = None
+        self.json_path: Optional[str] = None
+        self.flush_interval = 60.0
+        self._last_flush = time.monotonic()
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            self._stages.setdefault(stage, StageHistogram()).add(seconds)
+            if self.question_type is not None:
+                stages = self._by_question_type.setdefault(
+                    self.question_type, {})
+                stages.setdefault(stage, StageHistogram()).add(seconds)
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    @contextmanager
+    def question(self, question_type: str) -> Iterator[None]:
+        """Attribute the samples recorded inside the block to a question type."""
+        self.question_type = question_type
+        try:
+            with self.measure("question"):
+                yield
+        finally:
+            self.question_type = None
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+            self._by_question_type = {}
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "stages": {stage: histogram.to_dict() for stage, histogram in self._stages.items()},
+                "question_types": {
+                    question_type: {stage: histogram.to_dict() for stage, histogram in stages.items()}
+                    for question_type, stages in self._by_question_type.items()
+                },
+            }
+
+    def format_summary(self) -> str:
+        lines = [f"{'stage':<16}{'count':>8}{'mean':>10}{'p50':>10}{'p90':>10}{'max':>10}  (ms)"]
+        for stage, data in self.summary()["stages"].items():
+            lines.append(
+                f"{stage:<16}{data['count']:>8}{data['mean_ms']:>10}{data['p50_ms']:>10}"
+                f"{data['p90_ms']:>10}{data['max_ms']:>10}")
+        return "\n".join(lines)
+
+    def write_json(self, path: Optional[str] = None):
+        path = path or self.json_path
+        if path is None:
+            return
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.summary(), file, ensure_ascii=False, indent=4)
+        self._last_flush = time.monotonic()
+
+    def maybe_flush(self):
+        """Write the JSON summary if `flush_interval` seconds have passed."""
+        if self.json_path and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.write_json()
+
+
+# Shared by the bot, the UI helper and the solvers
+latency = LatencyRecorder()
@@ -1,13 +1,30 @@
 import logging
 from typing import Any, Dict
 
+INCORRECT_ANSWERS_LOG = 'incorrect_answers.log'
+
+_logger = logging.getLogger('auto_duolingo.incorrect_answers')
+_logger.setLevel(logging.INFO)
+_logger.propagate = False
+
+
+def set_incorrect_answer_log(path: str) -> None:
+    """Write incorrect answers to `path`; the file is created on the first one."""
+    for handler in list(_logger.handlers):
+        _logger.removeHandler(handler)
+        handler.close()
+    handler = logging.FileHandler(path, encoding='utf-8', delay=True)
+    handler.setFormatter(logging.Formatter(
+        '%(asctime)s - %(levelname)s - %(message)s'))
+    _logger.addHandler(handler)
+
 
 def log_incorrect_answer(result: Dict[str, Any]) -> None:
-    logging.basicConfig(filename='incorrect_answers.log', level=logging.INFO,
-                        format='%(asctime)s - %(levelname)s - %(message)s')
+    if not _logger.handlers:
+        set_incorrect_answer_log(INCORRECT_ANSWERS_LOG)
 
     if result["status"] == "incorrect":
         message = f"Incorrect Answer - Original: {result['original_sentence']}, Correct: {result['correct_answer']}, Selected: {', '.join(result['selected_options'])}"
-        logging.error(message)
+        _logger.error(message)
         print(message.replace(", Selected:", "\nSelected:").replace(
             "Correct:", "\nCorrect:") + "\n")
@@ -1,5 +1,19 @@
+import argparse
+
 from auto_duolingo.DuolingoBot import DuolingoBot
 
 if __name__ == "__main__":
-    bot = DuolingoBot()
+    parser = argparse.ArgumentParser(description="Run the Duolingo bot.")
+    parser.add_argument('--stats-json',
+                        help="Write per-stage latency histograms to this file")
+    parser.add_argument('--read-only', action='store_true',
+                        help="Open the databases read-only and don't save answers from result screens")
+    parser.add_argument('--snapshot',
+                        help="Answer from this file written by db.AnswerSnapshot instead of the databases")
+    parser.add_argument('--fuzzy', action='store_true',
+                        help="Fall back to near matches of sentences; needs SQLite with FTS5")
+    args = parser.parse_args()
+
+    bot = DuolingoBot(stats_path=args.stats_json, read_only=args.read_only, snapshot_path=args.snapshot,
+                      fuzzy_search=args.fuzzy)
     bot.run()
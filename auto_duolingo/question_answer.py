@@ -1,29 +1,62 @@
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
+from auto_duolingo.latency import latency
 from auto_duolingo.string_util import sort_substrings
+from auto_duolingo.ui_helper.Bounds import Bounds
+from db.AnswerCache import AnswerCache, question_fingerprint
+from db.ConnectionManager import connections
 from db.SentencePairDB import SentencePairDB
 from db.WordPairsDB import WordPairsDB
 
 
-def map_options_to_bounds(sorted_options, options_with_bounds):
-    options_with_bounds_dicts = [{'option': option, 'bounds': bounds,
-                                  'processed': False} for option, bounds in options_with_bounds]
+def map_options_to_bounds(sorted_options, options_with_bounds: List[Tuple[str, Bounds]]) -> List[Bounds]:
+    # Bounds of each option text, in screen order, consumed as they are used
+    bounds_by_option: Dict[str, List[Bounds]] = {}
+    for option, bounds in reversed(options_with_bounds):
+        bounds_by_option.setdefault(option, []).append(bounds)
+
     bounds_to_click = []
     for option in sorted_options:
-        for option_dict in options_with_bounds_dicts:
-            if option_dict['option'] == option and not option_dict['processed']:
-                bounds_to_click.append(option_dict['bounds'])
-                option_dict['processed'] = True  # Mark as processed
-                break  # Move to the next word in sorted_options
+        candidates = bounds_by_option.get(option)
+        if candidates:
+            bounds_to_click.append(candidates.pop())
     return bounds_to_click
 
 
-def solve_translate_sentence(sentence: str, options_with_bounds: List[Tuple[str, Dict[str, int]]]):
-    db_instance = SentencePairDB()
-    translation = db_instance.get_complementary_sentence(sentence)
+def solve_with_cache(question_type: str, prompt: str, options_with_bounds: List[Tuple[str, Bounds]],
+                     solve: Callable[[], List[Bounds]],
+                     answer_cache: Optional[AnswerCache] = None) -> Tuple[List[Bounds], str]:
+    """
+    Answer a question from the cache if it was seen before, otherwise with
+    `solve`, caching the texts of the options it taps. Returns the bounds to
+    click and the question's fingerprint, for `AnswerCache.record_status`.
+    """
+    answer_cache = answer_cache or connections.answer_cache()
+    fingerprint = question_fingerprint(
+        question_type, prompt, [option for option, _ in options_with_bounds])
+
+    answers = answer_cache.get(fingerprint)
+    if answers is not None:
+        print(f"Answer found in the cache: {answers}")
+        return map_options_to_bounds(answers, options_with_bounds), fingerprint
+
+    bounds_to_click = solve()
+    option_by_bounds = {bounds: option for option, bounds in options_with_bounds}
+    answers = [option_by_bounds[bounds]
+               for bounds in bounds_to_click if bounds in option_by_bounds]
+    if answers:
+        answer_cache.put(fingerprint, question_type, answers)
+    return bounds_to_click, fingerprint
+
+
+def solve_translate_sentence(sentence: str, options_with_bounds: List[Tuple[str, Bounds]],
+                             sentence_pair_db: Optional[SentencePairDB] = None):
+    sentence_pair_db = sentence_pair_db or connections.sentence_pair_db()
+    with latency.measure("db_lookup"):
+        translation, tier, distance = sentence_pair_db.lookup_sentence(sentence)
 
     if translation is not None:
-        print(f"Translation found in the database: {translation}")
+        print(f"Translation found in the database ({tier.value}, distance {distance}): {translation}")
         sorted_substrings, unmatched = sort_substrings(
             translation, [substring for substring, _ in options_with_bounds])
 
@@ -38,10 +71,13 @@ def solve_translate_sentence(sentence: str, options_with_bounds: List[Tuple[str,
     return bounds_to_click
 
 
-def solve_translate_word(word: str, options_with_bounds: List[Tuple[str, Dict[str, int]]]):
+def solve_translate_word(word: str, options_with_bounds: List[Tuple[str, Bounds]],
+                         word_pairs_db: Optional[WordPairsDB] = None):
     options = [option for option, _ in options_with_bounds]
+    word_pairs_db = word_pairs_db or connections.word_pairs_db()
 
-    db_matches = WordPairsDB().find_matches([word], options)
+    with latency.measure("db_lookup"):
+        db_matches = word_pairs_db.find_matches([word], options)
     print(f"db_matches: {db_matches}")
 
     translation = db_matches.get(word)
@@ -50,10 +86,13 @@ def solve_translate_word(word: str, options_with_bounds: List[Tuple[str, Dict[st
     return bounds_to_click
 
 
-def solve_word_pronunciation(word: str, options_with_bounds: List[Tuple[str, Dict[str, int]]]):
+def solve_word_pronunciation(word: str, options_with_bounds: List[Tuple[str, Bounds]],
+                             word_pairs_db: Optional[WordPairsDB] = None):
     options = [option for option, _ in options_with_bounds]
+    word_pairs_db = word_pairs_db or connections.word_pairs_db()
 
-    db_matches = WordPairsDB().find_matches([word], options)
+    with latency.measure("db_lookup"):
+        db_matches = word_pairs_db.find_matches([word], options)
     print(f"db_matches: {db_matches}")
 
     translation = db_matches.get(word)
@@ -62,11 +101,14 @@ def solve_word_pronunciation(word: str, options_with_bounds: List[Tuple[str, Dic
     return bounds_to_click
 
 
-def solve_matching_pairs(words_with_bounds, options_with_bounds, disable_inference=False):
+def solve_matching_pairs(words_with_bounds, options_with_bounds, disable_inference=False,
+                         word_pairs_db: Optional[WordPairsDB] = None):
     original_words = [word for word, _ in words_with_bounds]
     option_words = [option for option, _ in options_with_bounds]
+    word_pairs_db = word_pairs_db or connections.word_pairs_db()
 
-    db_matches = WordPairsDB().find_matches(original_words, option_words)
+    with latency.measure("db_lookup"):
+        db_matches = word_pairs_db.find_matches(original_words, option_words)
     print(f"db_matches: {db_matches}")
 
     unmatched_words = [word for word in db_matches if db_matches[word] is None]
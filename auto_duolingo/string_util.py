@@ -1,37 +1,206 @@
 import re
+from collections import Counter, deque
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 
-def sort_substrings(sentence, substrings):
-    sentence = re.sub(r'[^\w\s]', '', sentence)
+class AhoCorasick:
+    """
+    Automaton over a set of patterns that reports every occurrence of any of
+    them, overlapping ones included, in one pass over a text.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        # State 0 is the root; each state keeps its transitions, failure link
+        # and the patterns ending at it, longest first
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+        for pattern in dict.fromkeys(patterns):
+            if pattern:
+                self._add(pattern)
+        self._link()
+
+    def _add(self, pattern: str):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(pattern)
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                # Patterns of the failure state are suffixes, so shorter
+                self._output[next_state] = (self._output[next_state]
+                                            + self._output[self._fail[next_state]])
+
+    def find_all(self, text: str) -> Iterator[Tuple[int, str]]:
+        """Yield (start, pattern) for every occurrence, by end position."""
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for pattern in self._output[state]:
+                yield end - len(pattern), pattern
+
 
-    found_substrings = []
-    for sub in substrings:
-        if sub == '':  # Skip empty strings to prevent infinite loop
+# Segmentations kept for questions that come up again
+SEGMENT_CACHE_SIZE = 1024
+# Search nodes visited before settling for the best cover found so far
+SEGMENT_SEARCH_BUDGET = 20000
+
+# A cover is a list of (start position, tile index)
+Cover = List[Tuple[int, int]]
+
+
+def _cover_bounds(length: int, starting_at: Dict[int, List[int]], names: List[str]) -> List[int]:
+    """Most characters coverable from each position on, if tiles could be reused."""
+    bounds = [0] * (length + 1)
+    for position in range(length - 1, -1, -1):
+        best = bounds[position + 1]
+        for i in starting_at.get(position, ()):
+            best = max(best, len(names[i]) + bounds[position + len(names[i])])
+        bounds[position] = best
+    return bounds
+
+
+def _greedy_cover(length: int, starting_at: Dict[int, List[int]], names: List[str],
+                  counts: List[int]) -> Tuple[int, Cover]:
+    """Take the longest tile left at each position, left to right."""
+    remaining = list(counts)
+    cover: Cover = []
+    covered = 0
+    position = 0
+    while position < length:
+        i = next((i for i in starting_at.get(position, ()) if remaining[i]), None)
+        if i is None:
+            position += 1
             continue
-        start = 0
-        while True:
-            start = sentence.find(sub, start)
-            if start == -1:
-                break
-            found_substrings.append((sub, start))
-            start += len(sub)  # Move past this substring
-
-    # Sort by start position, then by length of the substring in descending order
-    # To handle cases with partial overlaps correctly,
-    # we need to adjust the logic to prioritize longer substrings when they start at the same position as shorter ones.
-    found_substrings.sort(key=lambda x: (x[1], -len(x[0])))
-
-    # Build the result list and the remaining sentence
+        remaining[i] -= 1
+        cover.append((position, i))
+        covered += len(names[i])
+        position += len(names[i])
+    return covered, cover
+
+
+def _search_cover(length: int, starting_at: Dict[int, List[int]], names: List[str],
+                  counts: List[int], best_covered: int, best_cover: Cover) -> Tuple[int, Cover]:
+    """
+    Branch and bound for a cover better than `best_cover`, in the greedy
+    pass's order: longer tiles first, leaving a character unmatched last.
+    A branch is pruned when neither the reusable-tile bound nor the tiles
+    left could beat the best cover. Gives up after SEGMENT_SEARCH_BUDGET nodes.
+    """
+    bounds = _cover_bounds(length, starting_at, names)
+    tiles_left = sum(len(name) * count for name, count in zip(names, counts))
+    stack = [(0, 0, tiles_left, tuple(counts), ())]
+    budget = SEGMENT_SEARCH_BUDGET
+    while stack and budget:
+        budget -= 1
+        position, covered, tiles_left, remaining, cover = stack.pop()
+        if covered > best_covered:
+            best_covered, best_cover = covered, list(cover)
+        if position >= length or covered + min(bounds[position], tiles_left) <= best_covered:
+            continue
+        children = []
+        for i in starting_at.get(position, ()):
+            if remaining[i]:
+                used = remaining[:i] + (remaining[i] - 1,) + remaining[i + 1:]
+                children.append((position + len(names[i]), covered + len(names[i]),
+                                 tiles_left - len(names[i]), used, cover + ((position, i),)))
+        children.append((position + 1, covered, tiles_left, remaining, cover))
+        # Popped in the order they were listed
+        stack.extend(reversed(children))
+    return best_covered, best_cover
+
+
+@lru_cache(maxsize=SEGMENT_CACHE_SIZE)
+def _segment(sentence: str, tiles: Tuple[Tuple[str, int], ...]) -> Tuple[Tuple[str, ...], str]:
+    """
+    Cover `sentence` with the (tile, count) multiset `tiles` so that the most
+    characters are covered. The greedy pass answers when it reaches the
+    bound; otherwise a budgeted search looks for a better cover. Among equal
+    covers the greedy pass's choice wins.
+    """
+    names = [tile for tile, _ in tiles]
+    counts = [count for _, count in tiles]
+    index = {tile: i for i, tile in enumerate(names)}
+    # Tiles starting at each position, longest first
+    starting_at: Dict[int, List[int]] = {}
+    for start, sub in AhoCorasick(names).find_all(sentence):
+        starting_at.setdefault(start, []).append(index[sub])
+    for candidates in starting_at.values():
+        candidates.sort(key=lambda i: len(names[i]), reverse=True)
+
+    length = len(sentence)
+    covered, cover = _greedy_cover(length, starting_at, names, counts)
+    tiles_total = sum(len(name) * count for name, count in tiles)
+    if covered < min(_cover_bounds(length, starting_at, names)[0], tiles_total):
+        covered, cover = _search_cover(
+            length, starting_at, names, counts, covered, cover)
+
     result_substrings = []
-    last_end = 0
-    for sub, start in found_substrings:
-        if start >= last_end:
-            result_substrings.append(sub)
-            last_end = start + len(sub)
-
-    # Reconstruct the unmatched part of the sentence
-    unmatched = sentence
-    for sub in result_substrings:
-        unmatched = unmatched.replace(sub, '', 1)
-
-    return result_substrings, unmatched
+    unmatched = []
+    position = 0
+    for start, i in cover:
+        unmatched.append(sentence[position:start])
+        result_substrings.append(names[i])
+        position = start + len(names[i])
+    unmatched.append(sentence[position:])
+    return tuple(result_substrings), ''.join(unmatched)
+
+
+def sort_substrings(sentence, substrings):
+    """
+    Order the tiles `substrings` as they appear in `sentence`, ignoring
+    punctuation, using each no more often than it is given. The tiles are
+    chosen to cover as much of the sentence as possible. Returns the ordered
+    tiles and the characters no tile covers.
+    """
+    sentence = re.sub(r'[^\w\s]', '', sentence)
+    tiles = tuple(sorted((tile, count)
+                  for tile, count in Counter(substrings).items() if tile))
+    result_substrings, unmatched = _segment(sentence, tiles)
+    return list(result_substrings), unmatched
+
+
+def is_valid_sort(result: Optional[List[str]], substrings: List[str]) -> bool:
+    """Whether the tiles `substrings` cover the sorted `result` completely."""
+    if not result:
+        return False
+    _, unmatched = sort_substrings(''.join(result), substrings)
+    return not unmatched
+
+
+def bounded_levenshtein(a: str, b: str, max_distance: int):
+    """
+    Levenshtein distance between `a` and `b`, or None as soon as it is known
+    to exceed `max_distance`.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (char_a != char_b)))
+        if min(current) > max_distance:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= max_distance else None
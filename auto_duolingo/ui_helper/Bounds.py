@@ -0,0 +1,68 @@
+from typing import Iterable, List, Tuple
+
+
+class Bounds:
+    """
+    The screen rectangle of a UI node, as found in the `bounds` attribute of a
+    hierarchy dump ("[left,top][right,bottom]").
+    """
+
+    __slots__ = ("left", "top", "right", "bottom", "center")
+
+    def __init__(self, left: int, top: int, right: int, bottom: int):
+        self.left = left
+        self.top = top
+        self.right = right
+        self.bottom = bottom
+        self.center: Tuple[int, int] = (
+            left + (right - left) // 2, top + (bottom - top) // 2)
+
+    @classmethod
+    def from_str(cls, bounds_str: str) -> "Bounds":
+        """Parse "[x1,y1][x2,y2]" without going through a regex."""
+        left, top, right, bottom = bounds_str[1:-1].replace("][", ",").split(",")
+        return cls(int(left), int(top), int(right), int(bottom))
+
+    @property
+    def width(self) -> int:
+        return self.right - self.left
+
+    @property
+    def height(self) -> int:
+        return self.bottom - self.top
+
+    def contains(self, x: int, y: int) -> bool:
+        return self.left <= x < self.right and self.top <= y < self.bottom
+
+    def intersects(self, other: "Bounds") -> bool:
+        return (self.left < other.right and other.left < self.right
+                and self.top < other.bottom and other.top < self.bottom)
+
+    def same_row(self, other: "Bounds") -> bool:
+        """True if the two rectangles overlap vertically."""
+        return self.top < other.bottom and other.top < self.bottom
+
+    def _key(self) -> Tuple[int, int, int, int]:
+        return (self.left, self.top, self.right, self.bottom)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Bounds):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        return f"Bounds({self.left}, {self.top}, {self.right}, {self.bottom})"
+
+
+def sort_by_rows(bounds_list: Iterable[Bounds]) -> List[Bounds]:
+    """Order rectangles the way they are read: top row first, left to right."""
+    rows: List[List[Bounds]] = []
+    for bounds in sorted(bounds_list, key=lambda b: (b.top, b.left)):
+        if rows and rows[-1][0].same_row(bounds):
+            rows[-1].append(bounds)
+        else:
+            rows.append([bounds])
+    return [bounds for row in rows for bounds in sorted(row, key=lambda b: b.left)]
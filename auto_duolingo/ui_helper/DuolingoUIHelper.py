@@ -1,64 +1,175 @@
 import time
-import xml.etree.ElementTree as ET
-from typing import Dict, List
+from typing import List, Optional
 
 import uiautomator2 as u2
 
+from auto_duolingo.latency import latency
+from auto_duolingo.ui_helper.Bounds import Bounds
 from auto_duolingo.ui_helper.constants import (
     ELEMENTS_OF_LISTENING_QUESTION,
     ELEMENTS_OF_UNIT_SELECTION,
 )
+from auto_duolingo.ui_helper.ScreenSnapshot import ScreenSnapshot
 from auto_duolingo.ui_helper.ui_info_extractor import (
     get_continue_button_bounds,
 )
 from tools.adb_utils import get_device_id
 
+# Delay between dumps of an unchanged screen, in seconds
+STABLE_SCREEN_MIN_DELAY = 0.1
+STABLE_SCREEN_MAX_DELAY = 1.0
+# Send multi-tap sequences as a single `input tap` shell script
+BATCH_TAPS = True
+# Polling interval of wait_for_any, doubled after every miss
+WAIT_MIN_INTERVAL = 0.1
+WAIT_MAX_INTERVAL = 0.8
 
-class DuolingoUIHelper:
-    def __init__(self):
-        device_id = get_device_id()
-        print(f"Connecting to {device_id}...")
-        self.d = u2.connect(device_id)
 
-    def get_current_screen(self) -> ET.ElementTree:
-        return ET.ElementTree(ET.fromstring(self.d.dump_hierarchy()))
+class DuolingoUIHelper:
+    def __init__(self, device=None):
+        """
+        Connect to an adb device, or drive `device` instead (any object with
+        the uiautomator2 device API, e.g. tools.FakeDevice).
+        """
+        if device is None:
+            device_id = get_device_id()
+            print(f"Connecting to {device_id}...")
+            device = u2.connect(device_id)
+        self.d = device
+        self._last_fingerprint = None
+        self._last_screen = None
+        # Latest snapshot whose parse time is not counted yet
+        self._unrecorded_screen: Optional[ScreenSnapshot] = None
+        self._stable_since = time.monotonic()
+
+    def get_current_screen(self) -> ScreenSnapshot:
+        with latency.measure("dump"):
+            xml = self.d.dump_hierarchy()
+        fingerprint = hash(xml)
+        if fingerprint == self._last_fingerprint:
+            # Same dump as last time: reuse the snapshot and everything
+            # already parsed from it
+            return self._last_screen
+
+        self.record_parse()
+        self._last_fingerprint = fingerprint
+        self._stable_since = time.monotonic()
+        # Parsed lazily: the bot loop often only needs the first few ids
+        self._last_screen = ScreenSnapshot.stream(xml)
+        self._unrecorded_screen = self._last_screen
+        return self._last_screen
+
+    def record_parse(self):
+        """
+        Count the parse time of the latest snapshot under `parse`. Snapshots
+        are parsed lazily while they are used, so this runs when a new dump
+        replaces one, and once more at the end of a run.
+        """
+        if self._unrecorded_screen is not None:
+            latency.record("parse", self._unrecorded_screen.parse_seconds)
+            self._unrecorded_screen = None
+
+    def screen_stable_for(self) -> float:
+        """Seconds since the dumped screen last changed."""
+        return time.monotonic() - self._stable_since
+
+    def stable_screen_delay(self) -> float:
+        """
+        How long to wait before dumping again. Starts short right after a
+        change and grows the longer the screen stays the same.
+        """
+        delay = self.screen_stable_for() / 2
+        return min(max(delay, STABLE_SCREEN_MIN_DELAY), STABLE_SCREEN_MAX_DELAY)
+
+    def wait_for_any(self, resource_ids: List[str], timeout: float = 10) -> Optional[ScreenSnapshot]:
+        """
+        Dump the screen until one of `resource_ids` is on it and return that
+        snapshot, or None after `timeout` seconds. Polls quickly at first and
+        more slowly the longer the wait goes on.
+        """
+        wanted = set(resource_ids)
+        deadline = time.monotonic() + timeout
+        interval = WAIT_MIN_INTERVAL
+        while True:
+            screen = self.get_current_screen()
+            if screen.scan_until(wanted) is not None:
+                return screen
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(interval, remaining))
+            interval = min(interval * 2, WAIT_MAX_INTERVAL)
 
     def wait_for_element_to_appear(self, resource_id, timeout=10):
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            if self.d(resourceId=resource_id).exists:
-                return True
-            time.sleep(0.5)  # Wait for half a second before checking again
-        return False
-
-    def click_element_if_exists(self, resource_ids: str) -> bool:
-        for resource_id in resource_ids:
-            element = self.d(resourceId=resource_id)
-            if element.exists:
-                element.click()
-                break
+        return self.wait_for_any([resource_id], timeout) is not None
+
+    def click_element_if_exists(self, resource_ids: List[str], screen: Optional[ScreenSnapshot] = None) -> bool:
+        """Click the first of `resource_ids` on `screen` (dumped if not given)."""
+        if screen is None:
+            screen = self.get_current_screen()
+        element = screen.find_first(resource_ids)
+        if element is not None:
+            self.d.click(*Bounds.from_str(element.attrib['bounds']).center)
         time.sleep(0.1)
+        return element is not None
+
+    def perform_clicks_by_bounds(self, bounds_list: List[Bounds], interval: float = 0.1, batched: Optional[bool] = None):
+        """
+        Tap the centre of each bounds in order, `interval` seconds apart.
+        Sequences of several taps are sent to the device as one shell script
+        unless `batched` is False; pass True to batch a single tap as well.
+        """
+        if batched is None:
+            batched = BATCH_TAPS and len(bounds_list) > 1
+        with latency.measure("taps"):
+            if batched and bounds_list and self._perform_taps_on_device(bounds_list, interval):
+                return
+
+            for bounds in bounds_list:
+                self.d.click(*bounds.center)
+                time.sleep(interval)
+
+    def _perform_taps_on_device(self, bounds_list: List[Bounds], interval: float) -> bool:
+        """
+        Run all taps in one round trip, with the delays enforced on the
+        device. Returns False if the script could not be sent at all.
+        """
+        commands = []
+        for x, y in (bounds.center for bounds in bounds_list):
+            commands.append(f"input tap {x} {y}")
+            if interval > 0:
+                commands.append(f"sleep {interval}")
+        try:
+            response = self.d.shell("; ".join(commands))
+        except Exception as e:
+            print(f"Error sending batched taps: {e}")
+            return False
+        if response.exit_code != 0:
+            # Some taps may have landed already, so do not send them again
+            print(f"Batched taps failed: {response.output}")
+        return True
 
-    def perform_clicks_by_bounds(self, bounds_list: List[Dict[str, int]], interval: float = 0.1):
-        for bounds in bounds_list:
-            click_x = bounds['left'] + (bounds['right'] - bounds['left']) // 2
-            click_y = bounds['top'] + (bounds['bottom'] - bounds['top']) // 2
-            self.d.click(click_x, click_y)
-            time.sleep(interval)
-
-    def wait_answer_result(self):
-        return self.wait_for_element_to_appear("com.duolingo:id/ribbonPrimaryTitle")
+    def wait_answer_result(self) -> Optional[ScreenSnapshot]:
+        """Wait for the grading ribbon and return the screen showing it."""
+        return self.wait_for_any(["com.duolingo:id/ribbonPrimaryTitle"])
 
     def click_elements_sequentially(self, elements: List[str]):
         click_started = False
         try:
             for element in elements:
-                if not self.d(resourceId=element).exists and not click_started:
-                    continue
-
-                if self.d(resourceId=element).wait(timeout=5.0):
+                found = self.get_current_screen().find(element)
+                if found is None:
+                    if not click_started:
+                        continue
+                    # Dump again only while waiting for the element to appear
+                    screen = self.wait_for_any([element], timeout=5.0)
+                    if screen is not None:
+                        found = screen.find(element)
+
+                if found is not None:
                     click_started = True
-                    self.d(resourceId=element).click()
+                    bounds = Bounds.from_str(found.attrib['bounds'])
+                    self.d.click(*bounds.center)
                     print(f"{element} clicked successfully.")
                 else:
                     print(f"{element} not found within the timeout period.")
@@ -68,18 +179,19 @@ class DuolingoUIHelper:
     def launch_app(self):
         self.d.app_start('com.duolingo')
 
-    def select_unit(self):
-        self.click_element_if_exists(ELEMENTS_OF_UNIT_SELECTION)
+    def select_unit(self, screen: Optional[ScreenSnapshot] = None):
+        self.click_element_if_exists(ELEMENTS_OF_UNIT_SELECTION, screen)
 
     def skip_listening_question(self):
         self.click_elements_sequentially(ELEMENTS_OF_LISTENING_QUESTION)
 
     def click_submit_button(self):
         submit_button_id = "com.duolingo:id/submitButton"
-        self.d(resourceId=submit_button_id).click()
-        time.sleep(0.1)
+        with latency.measure("taps"):
+            self.d(resourceId=submit_button_id).click()
+            time.sleep(0.1)
 
-    def click_continue_button_by_tree(self, tree: ET.ElementTree):
+    def click_continue_button_by_tree(self, tree: ScreenSnapshot):
         bounds = get_continue_button_bounds(tree)
         self.perform_clicks_by_bounds([bounds])
         time.sleep(0.1)
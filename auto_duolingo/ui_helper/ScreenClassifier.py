@@ -0,0 +1,106 @@
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from auto_duolingo.constants import ScreenState
+from auto_duolingo.ui_helper.Bounds import Bounds
+from auto_duolingo.ui_helper.constants import SCREEN_STATE_RULES
+from auto_duolingo.ui_helper.ScreenSnapshot import ScreenSnapshot
+
+DUOLINGO_PACKAGE = "com.duolingo"
+
+
+class ScreenClassification(NamedTuple):
+    state: ScreenState
+    # Bounds of the element that decided the state, e.g. the continue button
+    bounds: Optional[Bounds] = None
+    resource_id: Optional[str] = None
+
+
+class ScreenClassifier:
+    """
+    Classifies a screen from one pass over the resource-ids it contains.
+
+    All id lists of the rule table are compiled into a single dict mapping a
+    resource-id to its (rule rank, id rank, state). New states are added with
+    `register` instead of writing another scanning function.
+
+    On a streamed snapshot, the top rule is scanned for first: after each
+    hit, parsing goes on only for the ids of that rule ranked above it, so
+    it stops as soon as nothing later in the dump can outrank the hit.
+    """
+
+    def __init__(self, rules: Iterable[Tuple[ScreenState, Iterable[str]]] = SCREEN_STATE_RULES):
+        self._table: Dict[str, Tuple[int, int, ScreenState]] = {}
+        self._early_exit_ids: List[str] = []
+        self._rules: List[Tuple[ScreenState, List[str]]] = []
+        for state, resource_ids in rules:
+            self.register(state, resource_ids)
+
+    def register(self, state: ScreenState, resource_ids: Iterable[str], priority: Optional[int] = None):
+        """
+        Add a rule. Rules are checked in order; pass `priority` to insert the
+        rule at that position instead of appending it.
+        """
+        rule = (state, list(resource_ids))
+        if priority is None:
+            self._rules.append(rule)
+        else:
+            self._rules.insert(priority, rule)
+        self._compile()
+
+    def _compile(self):
+        self._table = {}
+        for rule_rank, (state, resource_ids) in enumerate(self._rules):
+            for id_rank, resource_id in enumerate(resource_ids):
+                # An id listed by several rules belongs to the first one
+                self._table.setdefault(
+                    resource_id, (rule_rank, id_rank, state))
+        self._early_exit_ids = list(self._rules[0][1]) if self._rules else []
+
+    def _classification(self, element: ET.Element) -> ScreenClassification:
+        resource_id = element.get("resource-id")
+        bounds = None
+        bounds_str = element.attrib.get("bounds")
+        if bounds_str:
+            bounds = Bounds.from_str(bounds_str)
+        return ScreenClassification(self._table[resource_id][2], bounds, resource_id)
+
+    def _scan_top_rule(self, screen: ScreenSnapshot) -> Optional[ET.Element]:
+        """The best-ranked id of the top rule on a streamed screen, read no further than needed."""
+        wanted = self._early_exit_ids
+        best = None
+        while wanted:
+            element = screen.scan_until(wanted)
+            if element is None:
+                break
+            best = element
+            wanted = wanted[:wanted.index(element.get("resource-id"))]
+        return best
+
+    def classify(self, screen: ScreenSnapshot) -> ScreenClassification:
+        if not screen.complete:
+            element = self._scan_top_rule(screen)
+            if element is not None and element.get("package") == DUOLINGO_PACKAGE:
+                return self._classification(element)
+
+        if not screen.has_package(DUOLINGO_PACKAGE):
+            return ScreenClassification(ScreenState.APP_NOT_LAUNCHED)
+
+        best = None
+        best_id = None
+        for resource_id in screen.resource_ids():
+            entry = self._table.get(resource_id)
+            if entry is not None and (best is None or entry < best):
+                best = entry
+                best_id = resource_id
+
+        if best is None:
+            return ScreenClassification(ScreenState.UNKNOWN)
+        return self._classification(screen.find(best_id))
+
+
+_default_classifier = ScreenClassifier()
+
+
+def classify_screen(screen: ScreenSnapshot) -> ScreenClassification:
+    return _default_classifier.classify(screen)
@@ -0,0 +1,215 @@
+import time
+import xml.etree.ElementTree as ET
+from typing import Collection, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+STREAM_CHUNK_SIZE = 4096
+
+
+class ScreenSnapshot:
+    """
+    An indexed view over a single UI hierarchy dump.
+
+    The hierarchy is walked exactly once. Nodes are indexed by resource-id
+    (in document order), the set of packages on screen is recorded, and every
+    node keeps its parent and its pre-order span so that "descendants of X
+    with id Y" is answered without rescanning the tree.
+
+    A snapshot created with `stream` is parsed incrementally: `scan_until`
+    reads only as far as the first wanted resource-id, and any other query
+    finishes the parse before answering.
+    """
+
+    def __init__(self, root: Optional[ET.Element] = None):
+        self._root = root
+        self._by_id: Dict[str, List[ET.Element]] = {}
+        self._packages: Set[str] = set()
+        self._parents: Dict[ET.Element, Optional[ET.Element]] = {}
+        # Pre-order position of a node and of its last descendant
+        self._spans: Dict[ET.Element, Tuple[int, int]] = {}
+        self._open_nodes: List[ET.Element] = []
+        self._position = 0
+        # Streaming state, cleared once the whole dump has been read
+        self._parser: Optional[ET.XMLPullParser] = None
+        self._xml: Optional[str] = None
+        self._offset = 0
+        # Time spent indexing and incrementally parsing this dump
+        self.parse_seconds = 0.0
+        if root is not None:
+            start = time.perf_counter()
+            self._index(root)
+            self.parse_seconds += time.perf_counter() - start
+
+    @classmethod
+    def from_xml(cls, xml: Union[str, bytes]) -> "ScreenSnapshot":
+        start = time.perf_counter()
+        snapshot = cls(ET.fromstring(xml))
+        snapshot.parse_seconds = time.perf_counter() - start
+        return snapshot
+
+    @classmethod
+    def stream(cls, xml: str) -> "ScreenSnapshot":
+        """Create a snapshot that parses `xml` only as far as it is queried."""
+        snapshot = cls()
+        snapshot._parser = ET.XMLPullParser(events=("start", "end"))
+        snapshot._xml = xml
+        return snapshot
+
+    def _on_start(self, element: ET.Element):
+        if self._root is None:
+            self._root = element
+        self._parents[element] = self._open_nodes[-1] if self._open_nodes else None
+        self._spans[element] = (self._position, self._position)
+        self._position += 1
+
+        resource_id = element.get("resource-id")
+        if resource_id:
+            self._by_id.setdefault(resource_id, []).append(element)
+        package = element.get("package")
+        if package:
+            self._packages.add(package)
+        self._open_nodes.append(element)
+
+    def _on_end(self):
+        element = self._open_nodes.pop()
+        self._spans[element] = (self._spans[element][0], self._position - 1)
+
+    def _index(self, root: ET.Element):
+        # Iterative pre-order walk; a None marker closes the innermost node
+        stack: List[Optional[ET.Element]] = [root]
+        while stack:
+            element = stack.pop()
+            if element is None:
+                self._on_end()
+                continue
+            self._on_start(element)
+            stack.append(None)
+            stack.extend(reversed(element))
+
+    def _pull(self, resource_ids: Collection[str] = ()) -> Optional[ET.Element]:
+        """
+        Feed the parser until a node with one of `resource_ids` starts, or to
+        the end of the dump. Returns that node, or None once parsing is done.
+        """
+        start = time.perf_counter()
+        try:
+            return self._pull_events(resource_ids)
+        finally:
+            self.parse_seconds += time.perf_counter() - start
+
+    def _pull_events(self, resource_ids: Collection[str]) -> Optional[ET.Element]:
+        while self._parser is not None:
+            for event, element in self._parser.read_events():
+                if event == "start":
+                    self._on_start(element)
+                    if element.get("resource-id") in resource_ids:
+                        return element
+                else:
+                    self._on_end()
+
+            if self._offset < len(self._xml):
+                chunk = self._xml[self._offset:self._offset + STREAM_CHUNK_SIZE]
+                self._offset += STREAM_CHUNK_SIZE
+                self._parser.feed(chunk)
+            else:
+                self._parser.close()
+                # close() may flush a last batch of events
+                for event, element in self._parser.read_events():
+                    if event == "start":
+                        self._on_start(element)
+                    else:
+                        self._on_end()
+                self._parser = None
+                self._xml = None
+        return None
+
+    def _ensure_complete(self):
+        if self._parser is not None:
+            self._pull()
+
+    @property
+    def complete(self) -> bool:
+        return self._parser is None
+
+    def scan_until(self, resource_ids: Collection[str]) -> Optional[ET.Element]:
+        """
+        Return the first node (in document order) whose resource-id is in
+        `resource_ids`, reading no further into the dump than needed.
+        """
+        # Nodes read so far all precede the unread part of the dump
+        seen = [self._by_id[resource_id][0]
+                for resource_id in resource_ids if resource_id in self._by_id]
+        if seen:
+            return min(seen, key=lambda element: self._spans[element][0])
+        return self._pull(resource_ids)
+
+    @property
+    def root(self) -> ET.Element:
+        self._ensure_complete()
+        return self._root
+
+    @property
+    def tree(self) -> ET.ElementTree:
+        return ET.ElementTree(self.root)
+
+    def resource_ids(self) -> Iterable[str]:
+        """Distinct resource-ids on screen, in order of first appearance."""
+        self._ensure_complete()
+        return self._by_id.keys()
+
+    def has(self, resource_id: str) -> bool:
+        self._ensure_complete()
+        return resource_id in self._by_id
+
+    def has_any(self, resource_ids: Iterable[str]) -> bool:
+        self._ensure_complete()
+        return any(resource_id in self._by_id for resource_id in resource_ids)
+
+    def has_package(self, package: str) -> bool:
+        self._ensure_complete()
+        return package in self._packages
+
+    def find(self, resource_id: str) -> Optional[ET.Element]:
+        """Return the first node with the given resource-id, in document order."""
+        self._ensure_complete()
+        elements = self._by_id.get(resource_id)
+        return elements[0] if elements else None
+
+    def findall(self, resource_id: str) -> List[ET.Element]:
+        self._ensure_complete()
+        return list(self._by_id.get(resource_id, ()))
+
+    def find_first(self, resource_ids: Iterable[str]) -> Optional[ET.Element]:
+        """Return the node of the first id in `resource_ids` that is on screen."""
+        self._ensure_complete()
+        for resource_id in resource_ids:
+            elements = self._by_id.get(resource_id)
+            if elements:
+                return elements[0]
+        return None
+
+    def parent(self, element: ET.Element) -> Optional[ET.Element]:
+        self._ensure_complete()
+        return self._parents.get(element)
+
+    def is_descendant(self, element: ET.Element, ancestor: ET.Element) -> bool:
+        self._ensure_complete()
+        start, end = self._spans[ancestor]
+        position = self._spans[element][0]
+        return start < position <= end
+
+    def findall_in(self, container: ET.Element, resource_id: str) -> List[ET.Element]:
+        """Return the descendants of `container` with the given resource-id."""
+        return [element for element in self.findall(resource_id)
+                if self.is_descendant(element, container)]
+
+    def find_in(self, container: ET.Element, resource_id: str) -> Optional[ET.Element]:
+        for element in self.findall(resource_id):
+            if self.is_descendant(element, container):
+                return element
+        return None
+
+    def text_of(self, resource_id: str, default: str = "") -> str:
+        element = self.find(resource_id)
+        if element is None:
+            return default
+        return element.get("text", default)
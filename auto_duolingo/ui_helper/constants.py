@@ -1,3 +1,5 @@
+from auto_duolingo.constants import ScreenState
+
 CONTINUE_BUTTON_IDS = [
     "com.duolingo:id/continueButtonGreen",
     "com.duolingo:id/continueButtonYellow",
@@ -35,4 +37,18 @@ ELEMENTS_OF_QUESTION_SCREEN = [
     "com.duolingo:id/disableListenButton",
 ]
 
-BTN_HINT_TEXT = "com.duolingo:id/hintText" # "轻点此处查看词库"
\ No newline at end of file
+BTN_HINT_TEXT = "com.duolingo:id/hintText" # "轻点此处查看词库"
+
+ELEMENTS_OF_NO_HEARTS = [
+    "com.duolingo:id/noHeartsTitle",
+]
+
+
+# Screen states in priority order: when ids of several states are on screen,
+# the earlier entry wins. Within an entry, earlier ids win as well.
+SCREEN_STATE_RULES = [
+    (ScreenState.CONTINUE, CONTINUE_BUTTON_IDS),
+    (ScreenState.UNIT_SELECTION, ELEMENTS_OF_UNIT_SELECTION),
+    (ScreenState.QUESTION, ELEMENTS_OF_QUESTION_SCREEN),
+    (ScreenState.NO_HEARTS, ELEMENTS_OF_NO_HEARTS),
+]
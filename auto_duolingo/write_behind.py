@@ -0,0 +1,110 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+# Seconds a write may wait in the queue for others to batch with
+FLUSH_INTERVAL = 2.0
+# Writes held before `insert_sentence_pair` and `call` block the caller
+MAX_PENDING = 1000
+
+_SENTENCE_PAIR = "sentence_pair"
+_CALL = "call"
+_FLUSH = "flush"
+_STOP = "stop"
+
+
+class WriteBehind:
+    """
+    Runs the bot's database writes and logging on a background thread, so the
+    UI loop does not wait on disk. Sentence pairs are batched into one
+    `insert_many` per flush; calls run in the order they were queued.
+
+    `open_databases` is called on the writer thread, the first time a pair is
+    written, and must return a ConnectionManager of its own: SQLite
+    connections cannot be used across threads. `index_sentence_pair` is
+    called on the caller's thread as each pair is queued, so that the
+    caller's in-memory sentence index sees it at once. `close` writes everything
+    still queued, so it belongs in the bot's `finally`, which also runs on
+    SIGINT.
+    """
+
+    def __init__(self, open_databases: Callable[[], Any], flush_interval: float = FLUSH_INTERVAL,
+                 max_pending: int = MAX_PENDING,
+                 index_sentence_pair: Optional[Callable[[str, str], None]] = None):
+        self._open_databases = open_databases
+        self._index_sentence_pair = index_sentence_pair
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Tuple[str, Any]]" = queue.Queue(max_pending)
+        self._databases = None
+        self._thread = threading.Thread(
+            target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def insert_sentence_pair(self, original_sentence: str, translated_sentence: str, source: str = ""):
+        if self._index_sentence_pair is not None:
+            self._index_sentence_pair(original_sentence, translated_sentence)
+        self._queue.put(
+            (_SENTENCE_PAIR, (original_sentence, translated_sentence, source)))
+
+    def call(self, function: Callable[..., Any], *args: Any):
+        """Run `function(*args)` on the writer thread, e.g. to log an answer."""
+        self._queue.put((_CALL, (function, args)))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Write everything queued so far. Returns False if `timeout` ran out first."""
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        return done.wait(timeout)
+
+    def close(self):
+        """Write everything queued and stop the thread."""
+        if self._thread.is_alive():
+            self._queue.put((_STOP, None))
+            self._thread.join()
+
+    def _run(self):
+        try:
+            while True:
+                batch, stop = self._collect()
+                self._write(batch)
+                if stop:
+                    break
+        finally:
+            if self._databases is not None:
+                self._databases.close()
+
+    def _collect(self) -> Tuple[List[Tuple[str, Any]], bool]:
+        """Wait for a write, then gather more until the interval ends or a flush is asked for."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while batch[-1][0] not in (_FLUSH, _STOP):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch, batch[-1][0] == _STOP
+
+    def _write(self, batch: List[Tuple[str, Any]]):
+        sentence_pairs = [payload for kind, payload in batch
+                          if kind == _SENTENCE_PAIR]
+        if sentence_pairs:
+            try:
+                if self._databases is None:
+                    self._databases = self._open_databases()
+                self._databases.sentence_pair_db().insert_many(sentence_pairs)
+            except Exception as e:
+                print(f"Error saving sentence pairs: {e}")
+
+        for kind, payload in batch:
+            if kind == _CALL:
+                function, args = payload
+                try:
+                    function(*args)
+                except Exception as e:
+                    print(f"Error in write-behind call: {e}")
+            elif kind == _FLUSH:
+                payload.set()
@@ -16,6 +16,8 @@
 import random
 
 from crawler.persist import get_cached_sentence_pairs
+from llm.async_llm import llm_race_sort_substrings
+from llm.response_cache import response_cache
 from llm.translate_llm import llm_sort_substrings, llm_sort_substrings_2
 
 
@@ -31,6 +33,7 @@ def benchmark(sample_count=3, llm_attempts=1):
     sentence_pairs = random.sample(get_cached_sentence_pairs(), sample_count)
     llm_v1_success_count = 0
     llm_v2_success_count = 0
+    llm_race_success_count = 0
 
     for pair in sentence_pairs:
 
@@ -52,8 +55,16 @@ def benchmark(sample_count=3, llm_attempts=1):
         if llm_v2_result == pair["tokens"]:
             llm_v2_success_count += 1
 
+        llm_race_result = llm_race_sort_substrings(
+            pair["sentence"], substrings, attempts=llm_attempts)
+        print(f"llm_race_result: {llm_race_result}")
+        if llm_race_result == pair["tokens"]:
+            llm_race_success_count += 1
+
     print(f"LLM-v1 Accuracy: {llm_v1_success_count / sample_count:.2%}")
     print(f"LLM-v2 Accuracy: {llm_v2_success_count / sample_count:.2%}")
+    print(f"LLM-race Accuracy: {llm_race_success_count / sample_count:.2%}")
+    print(f"LLM cache: {response_cache.stats()}")
 
 
 if __name__ == "__main__":
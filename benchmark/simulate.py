@@ -0,0 +1,122 @@
+# 用 tools/FakeDevice 回放 assets/hierarchy/ 下录制的界面, 不连手机跑完整的 DuolingoBot 循环,
+# 统计每分钟答题数, 用于压测和跟踪吞吐量回归。
+#
+# python -m benchmark.simulate --rounds 100 --latency 0.05 --json bench.json
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import List
+
+from auto_duolingo.DuolingoBot import DuolingoBot
+from auto_duolingo.latency import latency as stage_latency
+from auto_duolingo.logger import INCORRECT_ANSWERS_LOG, set_incorrect_answer_log
+from db.ConnectionManager import DEFAULT_DB_NAME, ConnectionManager
+from db.connection import DATA_FOLDER
+from tools.FakeDevice import FakeDevice, FakeScreen, ScriptFinished, load_hierarchy
+
+SUBMIT = ("com.duolingo:id/submitButton",)
+CONTINUE = ("com.duolingo:id/continueButtonRed",)
+OPTION = ("com.duolingo:id/optionText",)
+
+
+def build_lesson_script() -> List[FakeScreen]:
+    """One pass over every recorded question type, each followed by its result."""
+    result = FakeScreen(load_hierarchy("WRONG"), CONTINUE)
+    return [
+        FakeScreen(load_hierarchy("CHOOSE_CORRECT_TRANSLATION"), SUBMIT),
+        result,
+        FakeScreen(load_hierarchy("HOW_TO_PRONOUNCE"), SUBMIT),
+        result,
+        FakeScreen(load_hierarchy("CHOOSE_CORRECT_CHARACTER"), SUBMIT),
+        result,
+        FakeScreen(load_hierarchy("CHOOSE_CORRECT_PICTURE"), SUBMIT),
+        result,
+        # Five pairs, two taps each
+        FakeScreen(load_hierarchy("CHOOSE_MATCHING_PAIR"), OPTION, 10),
+        FakeScreen(load_hierarchy("TRANSLATE_JPN_TO_CHI"), SUBMIT),
+        result,
+    ]
+
+
+QUESTIONS_PER_LESSON = 6
+
+
+def count_answered(device: FakeDevice) -> int:
+    """Question screens the bot got past, i.e. ones it really answered."""
+    return sum(1 for screen in device.script[:device.position] if screen.advance_on != CONTINUE)
+
+
+def simulate(rounds: int = 10, latency: float = 0.0, verbose: bool = False,
+             time_scale: float = 1.0) -> dict:
+    """
+    Run the bot over `rounds` recorded lessons. It works on a copy of the
+    answer database in a scratch folder, which also receives the incorrect
+    answer log, so the data folder is left untouched.
+    """
+    device = FakeDevice(build_lesson_script() * rounds,
+                        latency=latency, time_scale=time_scale)
+    with tempfile.TemporaryDirectory() as scratch:
+        db_path = os.path.join(DATA_FOLDER, DEFAULT_DB_NAME)
+        if os.path.exists(db_path):
+            shutil.copy(db_path, scratch)
+        set_incorrect_answer_log(os.path.join(scratch, INCORRECT_ANSWERS_LOG))
+        databases = ConnectionManager(data_folder=scratch)
+        # Migrating and loading the copy is startup, not answering
+        databases.preload()
+        bot = DuolingoBot(device=device, databases=databases)
+        stage_latency.reset()
+
+        output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(
+            io.StringIO())
+        start = time.perf_counter()
+        try:
+            with output:
+                try:
+                    bot.run()
+                except ScriptFinished:
+                    pass
+            elapsed = time.perf_counter() - start
+        finally:
+            databases.close()
+            set_incorrect_answer_log(INCORRECT_ANSWERS_LOG)
+
+    questions = count_answered(device)
+    return {
+        "questions": questions,
+        "seconds": round(elapsed, 3),
+        "questions_per_minute": round(questions / elapsed * 60, 1),
+        "latency": latency,
+        "device_calls": dict(device.calls),
+        "stages": stage_latency.summary()["stages"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the bot against recorded screens and report throughput.")
+    parser.add_argument('--rounds', type=int, default=10,
+                        help="Number of passes over the recorded lesson")
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help="Simulated seconds per device call")
+    parser.add_argument('--time-scale', type=float, default=1.0,
+                        help="Scale simulated latency and on-device sleeps")
+    parser.add_argument('--json', help="Also write the summary to this file")
+    parser.add_argument('--verbose', action='store_true',
+                        help="Show the bot's output")
+    args = parser.parse_args()
+
+    summary = simulate(args.rounds, args.latency,
+                       args.verbose, args.time_scale)
+    print(json.dumps(summary, indent=4))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(summary, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
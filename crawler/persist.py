@@ -7,28 +7,26 @@ from crawler.session_process import (
     deduplicate_sentence_translations,
     deduplicate_word_pairs,
 )
-from db.SentencePairDB import SentencePairDB
-from db.WordPairsDB import WordPairsDB
+from db.ConnectionManager import ConnectionManager
 
 
 def save_results_to_db(all_results):
-    word_pairs_db = WordPairsDB()
-    sentence_pair_db = SentencePairDB()
+    databases = ConnectionManager()
+    word_pairs_db = databases.word_pairs_db()
+    sentence_pair_db = databases.sentence_pair_db()
     result_summary = {}  # Dictionary to store the summary of results
 
     for result_type, data_list in all_results.items():
         success_count = 0  # Initialize success count for each result type
 
         if result_type == "WORD_PAIR":
-            for data in data_list:
-                prompt, correct_choice = data
-                lastrowid = word_pairs_db.insert_word_pair(
-                    [prompt, correct_choice])
-                success_count += 1 if lastrowid > 0 else 0
+            success_count = word_pairs_db.insert_many(
+                (prompt, correct_choice) for prompt, correct_choice in data_list)
         elif result_type == "SENTENCE_TRANSLATION":
-            for data in data_list:
-                success_count += sentence_pair_db.insert_sentence_pair(
-                    data['sentence'], data['translation'], data.get('source', ""))
+            inserted, updated = sentence_pair_db.insert_many(
+                (data['sentence'], data['translation'], data.get('source', ""))
+                for data in data_list)
+            success_count = inserted + updated
 
         # Store the result summary instead of printing immediately
         result_summary[result_type] = (len(data_list), success_count)
@@ -38,6 +36,8 @@ def save_results_to_db(all_results):
         print(f"{result_type}: {total} items")
         print(f"{result_type}: {success} successfully inserted/updated")
 
+    databases.close()
+
 
 def stringify_keys(data):
     if isinstance(data, dict):
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import sqlite3
+from typing import Dict, Iterable, List, Optional
+
+from db.connection import open_connection
+
+# Answers are stored unverified until a result screen grades them
+UNVERIFIED = "unverified"
+CORRECT = "correct"
+INCORRECT = "incorrect"
+
+
+def question_fingerprint(question_type: str, prompt: str, options: Iterable[str]) -> str:
+    """Hash of a question that ignores the order its options are shown in."""
+    parts = [question_type, prompt or "", *sorted(options)]
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    def __init__(self, db_name: str = 'sentence_pairs.db', conn: Optional[sqlite3.Connection] = None,
+                 read_only: bool = False):
+        """
+        Answers of questions seen before, keyed by `question_fingerprint`.
+        Only answers graded correct are served; ungraded ones wait in
+        `pending` for `record_status`. Correct entries are loaded into memory
+        on first use, so a lookup is one dict access. In `read_only` mode new
+        answers are kept in memory only.
+
+        A connection passed as `conn` is shared and left open by `close`.
+        """
+        self._owns_conn = conn is None
+        self.conn = open_connection(db_name, read_only) if conn is None else conn
+        self.read_only = read_only
+        if not read_only:
+            self.create_table()
+        self._answers: Optional[Dict[str, List[str]]] = None
+        # Answers given this run and not graded yet
+        self.pending: Dict[str, List[str]] = {}
+
+    def close(self):
+        if self._owns_conn:
+            self.conn.close()
+
+    def create_table(self):
+        with self.conn:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS answer_cache (
+                    fingerprint TEXT PRIMARY KEY,
+                    question_type TEXT NOT NULL,
+                    answers TEXT NOT NULL,
+                    status TEXT NOT NULL
+                )
+            ''')
+
+    def _load_answers(self) -> Dict[str, List[str]]:
+        try:
+            cursor = self.conn.execute(
+                'SELECT fingerprint, answers FROM answer_cache WHERE status = ?', (CORRECT,))
+        except sqlite3.OperationalError:
+            # A read-only database created before the cache existed
+            return {}
+        return {fingerprint: json.loads(answers) for fingerprint, answers in cursor}
+
+    @property
+    def answers(self) -> Dict[str, List[str]]:
+        """Answers graded correct, loaded on first use and kept in step with `record_status`."""
+        if self._answers is None:
+            self._answers = self._load_answers()
+        return self._answers
+
+    def get(self, fingerprint: str) -> Optional[List[str]]:
+        """The correct answer texts for a question, in the order they are tapped."""
+        return self.answers.get(fingerprint)
+
+    def put(self, fingerprint: str, question_type: str, answers: List[str]):
+        """Store the answer given to a question, to be served once `record_status` grades it correct."""
+        self.pending[fingerprint] = list(answers)
+        if self.read_only:
+            return
+        with self.conn:
+            self.conn.execute('''
+                INSERT INTO answer_cache (fingerprint, question_type, answers, status)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(fingerprint) DO UPDATE
+                SET answers = excluded.answers, status = excluded.status
+            ''', (fingerprint, question_type, json.dumps(answers, ensure_ascii=False), UNVERIFIED))
+
+    def record_status(self, fingerprint: str, status: str):
+        """Mark an answer correct, or evict it if it was graded incorrect."""
+        if status == INCORRECT:
+            self.pending.pop(fingerprint, None)
+            self.answers.pop(fingerprint, None)
+            if not self.read_only:
+                with self.conn:
+                    self.conn.execute(
+                        'DELETE FROM answer_cache WHERE fingerprint = ?', (fingerprint,))
+        elif status == CORRECT and fingerprint in self.pending:
+            self.answers[fingerprint] = self.pending.pop(fingerprint)
+            if self.read_only:
+                return
+            with self.conn:
+                self.conn.execute(
+                    'UPDATE answer_cache SET status = ? WHERE fingerprint = ?', (CORRECT, fingerprint))
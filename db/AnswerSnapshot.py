@@ -0,0 +1,207 @@
+import argparse
+import mmap
+import os
+import sqlite3
+import struct
+from typing import Dict, List, Optional, Set, Tuple
+
+# pylint: disable=no-name-in-module
+from jellyfish import levenshtein_distance
+
+from db.connection import DATA_FOLDER, open_connection
+from db.SentencePairDB import LookupTier, SentenceLookup, add_normalized_view, normalize_sentence
+
+SNAPSHOT_MAGIC = b"ADSNAP01"
+# Magic, then the entry count and file offset of the sentence and word tables
+HEADER = struct.Struct("<8sIIII")
+OFFSET = struct.Struct("<I")
+# Separates the fields of a record; text containing it is rejected on export
+FIELD_SEPARATOR = b"\0"
+DEFAULT_SNAPSHOT_NAME = "answers.snapshot"
+
+
+def _encode_table(records: Dict[str, List[str]]) -> bytes:
+    """
+    A table is an offset array of count + 1 entries, relative to the end of
+    the array, followed by the records sorted by the UTF-8 bytes of their key.
+    Each record is its key and values joined by FIELD_SEPARATOR.
+    """
+    encoded = []
+    for key, values in records.items():
+        fields = [field.encode("utf-8") for field in (key, *values)]
+        if any(FIELD_SEPARATOR in field for field in fields):
+            raise ValueError(f"Cannot store text containing NUL: {key!r}")
+        encoded.append(FIELD_SEPARATOR.join(fields))
+    encoded.sort()
+    offsets = [0]
+    for record in encoded:
+        offsets.append(offsets[-1] + len(record))
+    return b"".join(OFFSET.pack(offset) for offset in offsets) + b"".join(encoded)
+
+
+def export_snapshot(conn: sqlite3.Connection, path: str) -> Tuple[int, int]:
+    """
+    Compile `sentence_pairs` and `word_pairs2` into a snapshot file. Sentences
+    are keyed by their normalized form, on either side, and words by themselves.
+    The file is replaced atomically, so bots mapping the old one are not
+    disturbed. Returns the number of sentence and word keys.
+    """
+    add_normalized_view(conn)
+    sentences: Dict[str, List[str]] = {}
+    for original, translated, original_key, translated_key in conn.execute('''
+        SELECT original_sentence, translated_sentence, original_normalized, translated_normalized
+        FROM sentence_pairs
+    '''):
+        for key, sentence, counterpart in ((original_key, original, translated),
+                                           (translated_key, translated, original)):
+            if key:
+                sentences.setdefault(key, []).extend((sentence, counterpart))
+
+    words: Dict[str, List[str]] = {}
+    for word1, word2 in conn.execute('SELECT word1, word2 FROM word_pairs2'):
+        if word1 != word2:
+            words.setdefault(word1, []).append(word2)
+            words.setdefault(word2, []).append(word1)
+
+    sentence_table = _encode_table(sentences)
+    word_table = _encode_table(words)
+    header = HEADER.pack(SNAPSHOT_MAGIC, len(sentences), HEADER.size,
+                         len(words), HEADER.size + len(sentence_table))
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(header)
+        file.write(sentence_table)
+        file.write(word_table)
+    os.replace(temp_path, path)
+    return len(sentences), len(words)
+
+
+class _Table:
+    """Binary search over one table of a mapped snapshot."""
+
+    def __init__(self, buffer: mmap.mmap, count: int, offset: int):
+        self._buffer = buffer
+        self._count = count
+        self._offsets = offset
+        self._records = offset + (count + 1) * OFFSET.size
+
+    def _bounds(self, index: int) -> Tuple[int, int]:
+        start, = OFFSET.unpack_from(self._buffer, self._offsets + index * OFFSET.size)
+        end, = OFFSET.unpack_from(self._buffer, self._offsets + (index + 1) * OFFSET.size)
+        return self._records + start, self._records + end
+
+    def _key(self, start: int, end: int) -> bytes:
+        key_end = self._buffer.find(FIELD_SEPARATOR, start, end)
+        return self._buffer[start:end if key_end == -1 else key_end]
+
+    def get(self, key: str) -> List[str]:
+        """The values stored under `key`, or an empty list."""
+        target = key.encode("utf-8")
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            start, end = self._bounds(middle)
+            record_key = self._key(start, end)
+            if record_key < target:
+                low = middle + 1
+            elif record_key > target:
+                high = middle
+            else:
+                fields = self._buffer[start:end].split(FIELD_SEPARATOR)
+                return [field.decode("utf-8") for field in fields[1:]]
+        return []
+
+
+class AnswerSnapshot:
+    """
+    Read-only answer source over a file written by `export_snapshot`. The file
+    is memory-mapped, so opening it reads only the header, and bot processes
+    on one host share its pages. It answers the lookups `question_answer`
+    makes of SentencePairDB and WordPairsDB, without the fuzzy tier.
+    """
+
+    read_only = True
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, sentence_count, sentence_offset, word_count, word_offset = HEADER.unpack_from(
+            self._buffer)
+        if magic != SNAPSHOT_MAGIC:
+            self._buffer.close()
+            raise ValueError(f"{path} is not an answer snapshot")
+        self._sentences = _Table(self._buffer, sentence_count, sentence_offset)
+        self._words = _Table(self._buffer, word_count, word_offset)
+
+    def close(self):
+        self._buffer.close()
+
+    def get_complementary_sentence(self, query_sentence: str) -> Optional[str]:
+        """Same as SentencePairDB.get_complementary_sentence."""
+        normalized = normalize_sentence(query_sentence)
+        if not normalized:
+            return None
+        fields = self._sentences.get(normalized)
+        if not fields:
+            return None
+        candidates = list(zip(fields[::2], fields[1::2]))
+        _, counterpart = min(candidates, key=lambda candidate: levenshtein_distance(
+            query_sentence, candidate[0]))
+        return counterpart
+
+    def lookup_sentence(self, query_sentence: str, max_distance: Optional[int] = None) -> SentenceLookup:
+        """Find the counterpart of a sentence; only exact matches are stored."""
+        counterpart = self.get_complementary_sentence(query_sentence)
+        if counterpart is not None:
+            return SentenceLookup(counterpart, LookupTier.EXACT, 0)
+        return SentenceLookup(None, LookupTier.MISS)
+
+    def query_related_words(self, word: str) -> List[str]:
+        return self._words.get(word)
+
+    def _two_hop_reach(self, word: str, neighbours: List[str]) -> Set[str]:
+        """Words paired with `word` directly or through one other word."""
+        reach = set(neighbours)
+        for neighbour in neighbours:
+            reach.update(self._words.get(neighbour))
+        reach.discard(word)
+        return reach
+
+    def find_matches(self, original_words: List[str], options: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Same as WordGraph.find_matches, which WordPairsDB uses: direct pairs
+        first, then matches through two pairs to options not yet taken. The
+        pairs are read from the mapped word table, not loaded into memory.
+        """
+        neighbours = {word: self._words.get(word) for word in original_words}
+        matches: Dict[str, Optional[str]] = {}
+        for word in original_words:
+            related = set(neighbours[word])
+            matches[word] = next((option for option in options if option in related), None)
+
+        taken = set(matches.values())
+        for word in original_words:
+            if matches[word] is not None or not neighbours[word]:
+                continue
+            reach = self._two_hop_reach(word, neighbours[word])
+            match = next((option for option in options
+                          if option in reach and option not in taken), None)
+            if match is not None:
+                matches[word] = match
+                taken.add(match)
+        return matches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compile the answer database into a read-only snapshot for the bot.")
+    parser.add_argument('--db', default='sentence_pairs.db',
+                        help="Database in the data folder to read")
+    parser.add_argument('--output', default=os.path.join(DATA_FOLDER, DEFAULT_SNAPSHOT_NAME),
+                        help="Snapshot file to write")
+    args = parser.parse_args()
+
+    source = open_connection(args.db, read_only=True)
+    sentence_keys, word_keys = export_snapshot(source, args.output)
+    source.close()
+    print(f"Wrote {sentence_keys} sentence keys and {word_keys} words to {args.output}")
@@ -0,0 +1,98 @@
+import sqlite3
+from typing import Dict, Optional, Union
+
+from db.AnswerCache import AnswerCache
+from db.AnswerSnapshot import AnswerSnapshot
+from db.connection import DATA_FOLDER, open_connection
+from db.SentencePairDB import SentencePairDB
+from db.WordPairsDB import WordPairsDB
+
+DEFAULT_DB_NAME = 'sentence_pairs.db'
+
+
+class ConnectionManager:
+    """
+    Opens each database once per process, on first use, and hands out shared
+    SentencePairDB and WordPairsDB instances over that connection. Schema
+    checks and index loading happen once, not once per question.
+
+    With `snapshot_path`, both are replaced by one mapped AnswerSnapshot and
+    SQLite is not opened; answers seen this run are cached in memory only.
+
+    `fuzzy_search` turns on the trigram tier of sentence lookups. It creates
+    an FTS5 index, kept up to date on every insert, so leave it off for
+    callers that only write, such as the crawler.
+    """
+
+    def __init__(self, db_name: str = DEFAULT_DB_NAME, read_only: bool = False, data_folder: str = DATA_FOLDER,
+                 snapshot_path: Optional[str] = None, fuzzy_search: bool = False):
+        self.db_name = db_name
+        self.fuzzy_search = fuzzy_search
+        self.snapshot_path = snapshot_path
+        self.read_only = read_only or snapshot_path is not None
+        self.data_folder = data_folder
+        self._connection: Optional[sqlite3.Connection] = None
+        self._databases: Dict[str, object] = {}
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = open_connection(
+                self.db_name, self.read_only, self.data_folder)
+        return self._connection
+
+    def snapshot(self) -> AnswerSnapshot:
+        if "snapshot" not in self._databases:
+            self._databases["snapshot"] = AnswerSnapshot(self.snapshot_path)
+        return self._databases["snapshot"]
+
+    def sentence_pair_db(self) -> Union[SentencePairDB, AnswerSnapshot]:
+        """The shared SentencePairDB, with its in-memory index and, if enabled, the fuzzy one."""
+        if self.snapshot_path is not None:
+            return self.snapshot()
+        if "sentence_pairs" not in self._databases:
+            self._databases["sentence_pairs"] = SentencePairDB(
+                conn=self.connection, read_only=self.read_only,
+                cache_sentences=True, fuzzy_search=self.fuzzy_search)
+        return self._databases["sentence_pairs"]
+
+    def word_pairs_db(self) -> Union[WordPairsDB, AnswerSnapshot]:
+        """The shared WordPairsDB, matching through its in-memory word graph."""
+        if self.snapshot_path is not None:
+            return self.snapshot()
+        if "word_pairs" not in self._databases:
+            self._databases["word_pairs"] = WordPairsDB(
+                conn=self.connection, read_only=self.read_only, use_graph=True)
+        return self._databases["word_pairs"]
+
+    def answer_cache(self) -> AnswerCache:
+        """The shared cache of answers to questions seen before."""
+        if "answer_cache" not in self._databases:
+            if self.snapshot_path is not None:
+                self._databases["answer_cache"] = AnswerCache(":memory:")
+            else:
+                self._databases["answer_cache"] = AnswerCache(
+                    conn=self.connection, read_only=self.read_only)
+        return self._databases["answer_cache"]
+
+    def preload(self):
+        """Open, migrate and load every database now rather than on first use."""
+        sentence_pair_db = self.sentence_pair_db()
+        word_pairs_db = self.word_pairs_db()
+        if isinstance(sentence_pair_db, SentencePairDB) and sentence_pair_db.cache_sentences:
+            _ = sentence_pair_db.sentence_index
+        if isinstance(word_pairs_db, WordPairsDB) and word_pairs_db.use_graph:
+            _ = word_pairs_db.word_graph
+        _ = self.answer_cache().answers
+
+    def close(self):
+        if "snapshot" in self._databases:
+            self._databases["snapshot"].close()
+        self._databases = {}
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+# Used by the solvers when no databases are passed in
+connections = ConnectionManager()
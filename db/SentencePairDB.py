@@ -1,31 +1,113 @@
-import os
+import math
 import re
 import sqlite3
-from typing import List, Optional, Tuple
+import unicodedata
+from enum import Enum
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
 
 # pylint: disable=no-name-in-module
 from jellyfish import levenshtein_distance
 
+from auto_duolingo.string_util import bounded_levenshtein
+from db.connection import open_connection
+
+PUNCTUATION_PATTERN = re.compile(r'[^\w\s]')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# Fuzzy matches may differ from the query in this fraction of its characters
+FUZZY_MAX_DISTANCE_RATIO = 0.2
+# Trigram hits ranked by FTS5 that are checked with the edit distance
+FUZZY_CANDIDATES = 50
+
+
+def normalize_sentence(sentence: str) -> str:
+    """
+    Fold full-width and half-width forms (NFKC), strip punctuation and
+    collapse whitespace, so that sentences differing only in those compare equal.
+    """
+    sentence = PUNCTUATION_PATTERN.sub('', unicodedata.normalize('NFKC', sentence))
+    return WHITESPACE_PATTERN.sub(' ', sentence).strip()
+
+
+def add_normalized_view(conn: sqlite3.Connection):
+    """
+    Let a read-only connection query the normalized columns of a database
+    that has not been migrated yet, such as the one shipped in the data
+    folder. A temporary view shadows `sentence_pairs` and computes them on
+    the fly; the file itself is not written.
+    """
+    columns = {row[1] for row in conn.execute('PRAGMA main.table_info(sentence_pairs)')}
+    if not columns or 'original_normalized' in columns:
+        return
+    conn.create_function('normalize_sentence', 1, normalize_sentence, deterministic=True)
+    query_only, = conn.execute('PRAGMA query_only').fetchone()
+    # Temporary objects are blocked by query_only, not by a read-only file
+    conn.execute('PRAGMA query_only = OFF')
+    try:
+        conn.execute('''
+        CREATE TEMP VIEW IF NOT EXISTS sentence_pairs AS
+        SELECT *, normalize_sentence(original_sentence) AS original_normalized,
+               normalize_sentence(translated_sentence) AS translated_normalized
+        FROM main.sentence_pairs
+        ''')
+    finally:
+        conn.execute(f'PRAGMA query_only = {query_only}')
+
+
+class LookupTier(Enum):
+    EXACT = "exact"
+    FUZZY = "fuzzy"
+    MISS = "miss"
+
+
+class SentenceMatch(NamedTuple):
+    sentence: str
+    counterpart: str
+    # Edit distance between the normalized query and sentence
+    distance: int
+
+
+class SentenceLookup(NamedTuple):
+    counterpart: Optional[str]
+    tier: LookupTier
+    distance: Optional[int] = None
+
 
 class SentencePairDB:
-    def __init__(self, db_name='sentence_pairs.db'):
-        """Initialize the database connection, storing the database file in a separate data folder."""
-        data_folder = os.path.join(os.path.dirname(__file__), '..', 'data')
-        if not os.path.exists(data_folder):
-            os.makedirs(data_folder)
-        if db_name == ":memory:":
-            db_path = ":memory:"
+    def __init__(self, db_name='sentence_pairs.db', cache_sentences: bool = False, fuzzy_search: bool = False,
+                 conn: Optional[sqlite3.Connection] = None, read_only: bool = False):
+        """
+        Initialize the database connection, storing the database file in a separate data folder.
+
+        With `cache_sentences`, complementary sentences are looked up in an
+        in-memory index instead of the normalized-column indexes. With
+        `fuzzy_search`, `lookup_sentence` falls back to a trigram index when
+        there is no exact match.
+
+        A connection passed as `conn` is shared and left open by `close`. In
+        `read_only` mode the schema is not created or migrated; the
+        normalized columns of an old schema are computed by `add_normalized_view`.
+        """
+        self._owns_conn = conn is None
+        self.conn = open_connection(db_name, read_only) if conn is None else conn
+        self.read_only = read_only
+        self.conn.create_function(
+            'normalize_sentence', 1, normalize_sentence, deterministic=True)
+        if read_only:
+            add_normalized_view(self.conn)
         else:
-            db_path = os.path.join(data_folder, db_name)
-        self.conn = sqlite3.connect(db_path)
-        self.create_table_sentence_pairs()
+            self.create_table_sentence_pairs()
+        self.cache_sentences = cache_sentences
+        self._sentence_index: Optional[Dict[str, List[Tuple[str, str]]]] = None
+        self.fuzzy_search = fuzzy_search and self.create_fuzzy_index()
 
     def __del__(self):
         self.close()
 
     def close(self):
-        """Close the database connection."""
-        self.conn.close()
+        """Close the database connection, unless it is shared."""
+        if self._owns_conn:
+            self.conn.close()
 
     def create_table_sentence_pairs(self):
         """Create the sentence_pairs table."""
@@ -42,49 +124,169 @@ class SentencePairDB:
             'CREATE INDEX IF NOT EXISTS idx_original ON sentence_pairs(original_sentence)')
         cursor.execute(
             'CREATE INDEX IF NOT EXISTS idx_translated ON sentence_pairs(translated_sentence)')
+        self.migrate_normalized_columns()
+        self.migrate_unique_pairs()
+        self.conn.commit()
+
+    def migrate_unique_pairs(self):
+        """
+        Drop duplicate pairs and enforce uniqueness for `insert_many`. Of each
+        group of duplicates, a row sourced from an incorrect answer is kept
+        first, then the newest.
+        """
+        cursor = self.conn.cursor()
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'idx_sentence_pair'").fetchone()
+        if exists:
+            return
+        cursor.execute('''
+        DELETE FROM sentence_pairs
+        WHERE id NOT IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY original_sentence, translated_sentence
+                    ORDER BY source = 'incorrect_answer' DESC, id DESC
+                ) AS position
+                FROM sentence_pairs
+            )
+            WHERE position = 1
+        )
+        ''')
+        if cursor.rowcount > 0:
+            print(f"Removed {cursor.rowcount} duplicate sentence pairs.")
+        cursor.execute(
+            'CREATE UNIQUE INDEX idx_sentence_pair ON sentence_pairs(original_sentence, translated_sentence)')
+        self.conn.commit()
+
+    def migrate_normalized_columns(self):
+        """Add the normalized-sentence columns and their indexes, and backfill rows missing them."""
+        cursor = self.conn.cursor()
+        columns = {row[1] for row in cursor.execute(
+            'PRAGMA table_info(sentence_pairs)')}
+        for column in ('original_normalized', 'translated_normalized'):
+            if column not in columns:
+                cursor.execute(
+                    f'ALTER TABLE sentence_pairs ADD COLUMN {column} TEXT')
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS idx_original_normalized ON sentence_pairs(original_normalized)')
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS idx_translated_normalized ON sentence_pairs(translated_normalized)')
+        cursor.execute('''
+        UPDATE sentence_pairs
+        SET original_normalized = normalize_sentence(original_sentence),
+            translated_normalized = normalize_sentence(translated_sentence)
+        WHERE original_normalized IS NULL OR translated_normalized IS NULL
+        ''')
         self.conn.commit()
 
+    def create_fuzzy_index(self) -> bool:
+        """
+        Create the FTS5 trigram index over the normalized columns, kept in sync
+        by triggers. Returns False if this SQLite build has no trigram tokenizer.
+        """
+        cursor = self.conn.cursor()
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sentence_pairs_fts'").fetchone()
+        if exists:
+            return True
+        try:
+            cursor.execute('''
+            CREATE VIRTUAL TABLE sentence_pairs_fts USING fts5(
+                original_normalized, translated_normalized,
+                content='sentence_pairs', content_rowid='id', tokenize='trigram'
+            )
+            ''')
+        except sqlite3.OperationalError as e:
+            print(f"Fuzzy sentence search is unavailable: {e}")
+            return False
+        cursor.executescript('''
+        CREATE TRIGGER IF NOT EXISTS sentence_pairs_fts_insert AFTER INSERT ON sentence_pairs BEGIN
+            INSERT INTO sentence_pairs_fts(rowid, original_normalized, translated_normalized)
+            VALUES (new.id, new.original_normalized, new.translated_normalized);
+        END;
+        CREATE TRIGGER IF NOT EXISTS sentence_pairs_fts_delete AFTER DELETE ON sentence_pairs BEGIN
+            INSERT INTO sentence_pairs_fts(sentence_pairs_fts, rowid, original_normalized, translated_normalized)
+            VALUES ('delete', old.id, old.original_normalized, old.translated_normalized);
+        END;
+        CREATE TRIGGER IF NOT EXISTS sentence_pairs_fts_update AFTER UPDATE ON sentence_pairs BEGIN
+            INSERT INTO sentence_pairs_fts(sentence_pairs_fts, rowid, original_normalized, translated_normalized)
+            VALUES ('delete', old.id, old.original_normalized, old.translated_normalized);
+            INSERT INTO sentence_pairs_fts(rowid, original_normalized, translated_normalized)
+            VALUES (new.id, new.original_normalized, new.translated_normalized);
+        END;
+        INSERT INTO sentence_pairs_fts(sentence_pairs_fts) VALUES ('rebuild');
+        ''')
+        self.conn.commit()
+        return True
+
     def insert_sentence_pair(self, original_sentence: str, translated_sentence: str, source: str = "") -> int:
-        """Insert a new sentence pair into the database if it doesn't already exist, or update if source is 'incorrect_source'. Returns the number of successful inserts/updates."""
+        """Insert a new sentence pair into the database if it doesn't already exist, or update if source is 'incorrect_answer'. Returns the number of successful inserts/updates."""
 
         # Prevent insertion of empty sentence pairs
         if not original_sentence.strip() or not translated_sentence.strip():
             print("Cannot insert empty sentence pairs.")
             return 0
 
-        cursor = self.conn.cursor()
-        success_count = 0
+        inserted, updated = self.insert_many(
+            [(original_sentence, translated_sentence, source)])
+        return inserted + updated
 
-        # Check if the sentence pair already exists
-        query = '''
-        SELECT id 
-        FROM sentence_pairs 
-        WHERE original_sentence = ? AND translated_sentence = ?
-        '''
-        cursor.execute(query, (original_sentence, translated_sentence))
-        result = cursor.fetchone()
+    def insert_many(self, sentence_pairs: Iterable[Tuple[str, str, str]]) -> Tuple[int, int]:
+        """
+        Insert (original, translated, source) triples in one transaction.
+        Existing pairs are left alone unless the new source is 'incorrect_answer',
+        which overwrites theirs. Empty pairs are skipped.
 
-        if result is None:  # If the pair does not exist, insert it
-            cursor.execute('INSERT INTO sentence_pairs (original_sentence, translated_sentence, source) VALUES (?, ?, ?)',
-                           (original_sentence, translated_sentence, source))
-            success_count = 1
-        else:
-            # If the pair exists and source is 'incorrect_answer', update the entry
-            if source == 'incorrect_answer':
-                update_query = '''
-                UPDATE sentence_pairs
-                SET original_sentence = ?, translated_sentence = ?, source = ?
-                WHERE id = ?
-                '''
-                cursor.execute(update_query, (original_sentence,
-                               translated_sentence, source, result[0]))
-                success_count = 1
-            else:
-                # print("Sentence pair already exists in the database.")
-                pass
+        Returns the number of inserted and of updated rows.
+        """
+        rows = [
+            (original, translated, source or "",
+             normalize_sentence(original), normalize_sentence(translated))
+            for original, translated, source in sentence_pairs
+            if original.strip() and translated.strip()
+        ]
+        if not rows:
+            return 0, 0
 
-        self.conn.commit()
-        return success_count
+        with self.conn:
+            last_id = self.conn.execute(
+                'SELECT COALESCE(MAX(id), 0) FROM sentence_pairs').fetchone()[0]
+            cursor = self.conn.executemany('''
+            INSERT INTO sentence_pairs
+                (original_sentence, translated_sentence, source, original_normalized, translated_normalized)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(original_sentence, translated_sentence) DO UPDATE
+            SET source = excluded.source
+            WHERE excluded.source = 'incorrect_answer'
+            ''', rows)
+            # Counts inserts and updates, but not the writes of the FTS triggers
+            changes = cursor.rowcount
+            # New rows get ids above the previous maximum
+            new_rows = self.conn.execute('''
+            SELECT original_sentence, translated_sentence, original_normalized, translated_normalized
+            FROM sentence_pairs
+            WHERE id > ?
+            ''', (last_id,)).fetchall()
+
+        if self._sentence_index is not None:
+            for original, translated, original_key, translated_key in new_rows:
+                self._add_to_index(self._sentence_index, original, translated,
+                                   original_key, translated_key)
+        return len(new_rows), changes - len(new_rows)
+
+    def index_sentence_pair(self, original_sentence: str, translated_sentence: str):
+        """
+        Add a pair saved through another connection, e.g. by the bot's
+        WriteBehind, to the in-memory index if it is loaded.
+        """
+        if self._sentence_index is None:
+            return
+        original_key = normalize_sentence(original_sentence)
+        translated_key = normalize_sentence(translated_sentence)
+        if (original_sentence, translated_sentence) in self._sentence_index.get(original_key, ()):
+            return
+        self._add_to_index(self._sentence_index, original_sentence, translated_sentence,
+                           original_key, translated_key)
 
     def find_sentence_pair(self, query_sentence: str) -> List[Tuple[str, str]]:
         """Find a sentence pair by searching both original and translated sentences."""
@@ -98,44 +300,115 @@ class SentencePairDB:
         cursor.execute(query, (search_term, search_term))
         return cursor.fetchall()
 
-    def get_complementary_sentence(self, query_sentence: str) -> Optional[str]:
-        results = self.find_sentence_pair(query_sentence)
-        if not results:
-            return None
+    def find_by_normalized(self, normalized: str) -> List[Tuple[str, str]]:
+        """Return (sentence, counterpart) for every sentence, on either side, with the given normalized form."""
+        cursor = self.conn.cursor()
+        query = '''
+        SELECT original_sentence, translated_sentence
+        FROM sentence_pairs
+        WHERE original_normalized = ?
+        UNION ALL
+        SELECT translated_sentence, original_sentence
+        FROM sentence_pairs
+        WHERE translated_normalized = ?
+        '''
+        cursor.execute(query, (normalized, normalized))
+        return cursor.fetchall()
 
-        lowest_distance = float('inf')
-        # Holds the best matching original and translated sentences
-        best_match_pair = (None, None)
+    def _load_sentence_index(self) -> Dict[str, List[Tuple[str, str]]]:
+        """Map the normalized form of every sentence, on either side, to (sentence, counterpart)."""
+        index: Dict[str, List[Tuple[str, str]]] = {}
+        cursor = self.conn.execute('''
+        SELECT original_sentence, translated_sentence, original_normalized, translated_normalized
+        FROM sentence_pairs
+        ''')
+        for original, translated, original_key, translated_key in cursor:
+            self._add_to_index(index, original, translated,
+                               original_key, translated_key)
+        return index
 
-        for original, translated in results:
-            # Calculate distance from the query to both the original and translated sentences
-            distance_original = levenshtein_distance(query_sentence, original)
-            distance_translated = levenshtein_distance(
-                query_sentence, translated)
+    @staticmethod
+    def _add_to_index(index: Dict[str, List[Tuple[str, str]]], original: str, translated: str,
+                      original_key: str, translated_key: str):
+        for key, sentence, counterpart in ((original_key, original, translated),
+                                           (translated_key, translated, original)):
+            if key:
+                index.setdefault(key, []).append((sentence, counterpart))
 
-            # Update if a closer match is found
-            if distance_original < lowest_distance:
-                lowest_distance = distance_original
-                best_match_pair = (original, translated)
-            if distance_translated < lowest_distance:
-                lowest_distance = distance_translated
-                best_match_pair = (translated, original)
+    @property
+    def sentence_index(self) -> Dict[str, List[Tuple[str, str]]]:
+        """Loaded on first use and kept in step with `insert_sentence_pair`."""
+        if self._sentence_index is None:
+            self._sentence_index = self._load_sentence_index()
+        return self._sentence_index
 
-        # Remove punctuation from both sentences for comparison
+    def get_complementary_sentence(self, query_sentence: str) -> Optional[str]:
+        """
+        Return the counterpart of the stored sentence that differs from
+        `query_sentence` only in punctuation, character width or spacing, or None.
+        """
+        normalized = normalize_sentence(query_sentence)
+        if not normalized:
+            return None
+        if self.cache_sentences:
+            candidates = self.sentence_index.get(normalized)
+        else:
+            candidates = self.find_by_normalized(normalized)
+        if not candidates:
+            return None
+        # Several sentences can share a key; prefer the closest spelling
+        _, counterpart = min(candidates, key=lambda candidate: levenshtein_distance(
+            query_sentence, candidate[0]))
+        return counterpart
 
-        def remove_punctuation(s: str) -> str:
-            return re.sub(r'[^\w\s]', '', s)
+    def find_similar_sentences(self, query_sentence: str, k: int = 5,
+                               max_distance: Optional[int] = None) -> List[SentenceMatch]:
+        """
+        Return up to `k` stored sentences, on either side, whose normalized form
+        is within `max_distance` edits of the query's, closest first. The
+        default bound is FUZZY_MAX_DISTANCE_RATIO of the query length.
+        """
+        normalized = normalize_sentence(query_sentence)
+        # Trigrams are the smallest unit the index can match
+        if not self.fuzzy_search or len(normalized) < 3:
+            return []
+        if max_distance is None:
+            max_distance = math.ceil(len(normalized) * FUZZY_MAX_DISTANCE_RATIO)
 
-        query_no_punct = remove_punctuation(query_sentence)
-        best_match_no_punct = remove_punctuation(best_match_pair[0])
-        print(f"query_no_punct: {query_no_punct}")
-        print(f"best_match_no_punct: {best_match_no_punct}")
+        trigrams = dict.fromkeys(normalized[i:i + 3]
+                                 for i in range(len(normalized) - 2))
+        match_query = " OR ".join(
+            '"' + trigram.replace('"', '""') + '"' for trigram in trigrams)
+        cursor = self.conn.cursor()
+        cursor.execute('''
+        SELECT s.original_sentence, s.translated_sentence, s.original_normalized, s.translated_normalized
+        FROM sentence_pairs_fts
+        JOIN sentence_pairs AS s ON s.id = sentence_pairs_fts.rowid
+        WHERE sentence_pairs_fts MATCH ?
+        ORDER BY rank
+        LIMIT ?
+        ''', (match_query, FUZZY_CANDIDATES))
 
-        # Check if the difference is only in punctuation
-        if query_no_punct != best_match_no_punct:
-            return None
+        matches = []
+        for original, translated, original_key, translated_key in cursor.fetchall():
+            for key, sentence, counterpart in ((original_key, original, translated),
+                                               (translated_key, translated, original)):
+                distance = bounded_levenshtein(normalized, key or "", max_distance)
+                if distance is not None:
+                    matches.append(SentenceMatch(sentence, counterpart, distance))
+        matches.sort(key=lambda match: match.distance)
+        return matches[:k]
 
-        return best_match_pair[1]
+    def lookup_sentence(self, query_sentence: str, max_distance: Optional[int] = None) -> SentenceLookup:
+        """Find the counterpart of a sentence, reporting which tier answered."""
+        counterpart = self.get_complementary_sentence(query_sentence)
+        if counterpart is not None:
+            return SentenceLookup(counterpart, LookupTier.EXACT, 0)
+        matches = self.find_similar_sentences(
+            query_sentence, k=1, max_distance=max_distance)
+        if matches:
+            return SentenceLookup(matches[0].counterpart, LookupTier.FUZZY, matches[0].distance)
+        return SentenceLookup(None, LookupTier.MISS)
 
     def fetch_all_sentence_pairs(self) -> List[Tuple[str, str, str, int]]:
         """Fetch all sentence pairs from the database."""
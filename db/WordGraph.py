@@ -0,0 +1,88 @@
+import sys
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+
+class WordGraph:
+    """
+    Undirected graph of paired words, held in memory. Words are interned and
+    mapped to integer ids; each id keeps its neighbours and the set of ids it
+    reaches within `max_hops`, so a lookup is a set intersection.
+    """
+
+    def __init__(self, pairs: Iterable[Tuple[str, str]] = (), max_hops: int = 2):
+        self.max_hops = max_hops
+        self._ids: Dict[str, int] = {}
+        self._words: List[str] = []
+        self._neighbours: List[Set[int]] = []
+        self._reach: List[FrozenSet[int]] = []
+        for word1, word2 in pairs:
+            self._link(self._id(word1), self._id(word2))
+        self._reach = [self._compute_reach(word_id)
+                       for word_id in range(len(self._words))]
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def _id(self, word: str) -> int:
+        word_id = self._ids.get(word)
+        if word_id is None:
+            word_id = len(self._words)
+            word = sys.intern(word)
+            self._ids[word] = word_id
+            self._words.append(word)
+            self._neighbours.append(set())
+            self._reach.append(frozenset())
+        return word_id
+
+    def _link(self, id1: int, id2: int):
+        if id1 != id2:
+            self._neighbours[id1].add(id2)
+            self._neighbours[id2].add(id1)
+
+    def _compute_reach(self, word_id: int) -> FrozenSet[int]:
+        reached = set(self._neighbours[word_id])
+        frontier = reached
+        for _ in range(self.max_hops - 1):
+            frontier = {next_id for frontier_id in frontier
+                        for next_id in self._neighbours[frontier_id]} - reached
+            reached |= frontier
+        reached.discard(word_id)
+        return frozenset(reached)
+
+    def add_pair(self, word1: str, word2: str):
+        """Link two words and refresh the reach of every word it can affect."""
+        id1, id2 = self._id(word1), self._id(word2)
+        self._link(id1, id2)
+        affected = {id1, id2}
+        for _ in range(self.max_hops - 1):
+            affected |= {next_id for word_id in affected
+                         for next_id in self._neighbours[word_id]}
+        for word_id in affected:
+            self._reach[word_id] = self._compute_reach(word_id)
+
+    def find_matches(self, original_words: List[str], options: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Map each original word to an option, preferring a direct pair. Words
+        left over are matched through up to `max_hops` pairs, to options no
+        direct match has taken. Ties go to the earliest option.
+        """
+        option_ids = [self._ids.get(option) for option in options]
+        matches: Dict[str, Optional[str]] = {}
+        for word in original_words:
+            word_id = self._ids.get(word)
+            neighbours = self._neighbours[word_id] if word_id is not None else ()
+            matches[word] = next((option for option, option_id in zip(options, option_ids)
+                                  if option_id in neighbours), None)
+
+        taken = set(matches.values())
+        for word in original_words:
+            word_id = self._ids.get(word)
+            if matches[word] is not None or word_id is None:
+                continue
+            reach = self._reach[word_id]
+            match = next((option for option, option_id in zip(options, option_ids)
+                          if option_id in reach and option not in taken), None)
+            if match is not None:
+                matches[word] = match
+                taken.add(match)
+        return matches
@@ -1,23 +1,31 @@
-import os
 import sqlite3
-from typing import List, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from db.connection import open_connection
+from db.WordGraph import WordGraph
 
 
 class WordPairsDB:
-    def __init__(self, db_name: str = 'sentence_pairs.db'):
-        """Initialize the database connection, storing the database file in the same data folder as SentencePairDB."""
-        data_folder = os.path.join(os.path.dirname(__file__), '..', 'data')
-        if not os.path.exists(data_folder):
-            os.makedirs(data_folder)
-        if db_name == ":memory:":
-            db_path = ":memory:"
-        else:
-            db_path = os.path.join(data_folder, db_name)
-        self.conn = sqlite3.connect(db_path)
-        self.create_table()
+    def __init__(self, db_name: str = 'sentence_pairs.db', conn: Optional[sqlite3.Connection] = None,
+                 read_only: bool = False, use_graph: bool = False):
+        """
+        Initialize the database connection, storing the database file in the same data folder as SentencePairDB.
+        A connection passed as `conn` is shared and left open by `close`.
+
+        With `use_graph`, `find_matches` runs on an in-memory WordGraph of all
+        pairs, which also matches words linked through an intermediate word.
+        """
+        self._owns_conn = conn is None
+        self.conn = open_connection(db_name, read_only) if conn is None else conn
+        self.read_only = read_only
+        if not read_only:
+            self.create_table()
+        self.use_graph = use_graph
+        self._word_graph: Optional[WordGraph] = None
 
     def close(self):
-        self.conn.close()
+        if self._owns_conn:
+            self.conn.close()
 
     def create_table(self):
         with self.conn:
@@ -29,6 +37,9 @@ class WordPairsDB:
                     UNIQUE(word1, word2)
                 )
             ''')
+            # UNIQUE(word1, word2) already indexes lookups by word1
+            self.conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_word_pairs2_word2 ON word_pairs2(word2, word1)')
 
     def insert_word_pair(self, words: Tuple[str, str]) -> int:
         # Sort the words to ensure (a, b) and (b, a) are treated as the same combination
@@ -39,7 +50,31 @@ class WordPairsDB:
                 INSERT OR IGNORE INTO word_pairs2 (word1, word2)
                 VALUES (?, ?)
             ''', sorted_words)
-            return cursor.lastrowid
+        if self._word_graph is not None:
+            self._word_graph.add_pair(*sorted_words)
+        return cursor.lastrowid
+
+    def insert_many(self, word_pairs: Iterable[Tuple[str, str]]) -> int:
+        """Insert word pairs in one transaction, skipping known ones. Returns the number inserted."""
+        rows = [tuple(sorted(words)) for words in word_pairs]
+        with self.conn:
+            cursor = self.conn.executemany('''
+                INSERT INTO word_pairs2 (word1, word2)
+                VALUES (?, ?)
+                ON CONFLICT(word1, word2) DO NOTHING
+            ''', rows)
+        if self._word_graph is not None:
+            for word1, word2 in rows:
+                self._word_graph.add_pair(word1, word2)
+        return cursor.rowcount
+
+    @property
+    def word_graph(self) -> WordGraph:
+        """Loaded on first use and kept in step with the insert methods."""
+        if self._word_graph is None:
+            cursor = self.conn.execute('SELECT word1, word2 FROM word_pairs2')
+            self._word_graph = WordGraph(cursor)
+        return self._word_graph
 
     def query_related_words(self, word: str) -> List[str]:
         with self.conn:
@@ -58,16 +93,35 @@ class WordPairsDB:
 
         return list(related_words)
 
-    def find_matches(self, original_words: List[str], options: List[str]):
+    def find_matches(self, original_words: List[str], options: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Map each original word to an option it is paired with, or None. All
+        words are resolved in one query; ties go to the earliest option.
+        With `use_graph`, the lookup runs on `word_graph` instead.
+        """
+        if self.use_graph:
+            return self.word_graph.find_matches(original_words, options)
+        words = list(dict.fromkeys(original_words))
+        unique_options = list(dict.fromkeys(options))
+        related: Dict[str, Set[str]] = {}
+        if words and unique_options:
+            word_marks = ", ".join("?" * len(words))
+            option_marks = ", ".join("?" * len(unique_options))
+            with self.conn:
+                cursor = self.conn.execute(f'''
+                    SELECT word1, word2 FROM word_pairs2
+                    WHERE word1 IN ({word_marks}) AND word2 IN ({option_marks})
+                    UNION ALL
+                    SELECT word2, word1 FROM word_pairs2
+                    WHERE word2 IN ({word_marks}) AND word1 IN ({option_marks})
+                ''', words + unique_options + words + unique_options)
+                for word, option in cursor:
+                    if option != word:
+                        related.setdefault(word, set()).add(option)
+
         matches = {}
         for word in original_words:
-            related_words = self.query_related_words(word)
-            match_found = False
-            for related_word in related_words:
-                if related_word in options:
-                    matches[word] = related_word
-                    match_found = True
-                    break
-            if not match_found:
-                matches[word] = None
+            candidates = related.get(word, ())
+            matches[word] = next(
+                (option for option in unique_options if option in candidates), None)
         return matches
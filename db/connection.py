@@ -0,0 +1,43 @@
+import os
+import sqlite3
+
+DATA_FOLDER = os.path.join(os.path.dirname(__file__), '..', 'data')
+# Milliseconds to wait for another process's write lock
+BUSY_TIMEOUT_MS = 5000
+# Page cache per connection, in KiB
+CACHE_SIZE_KIB = 16 * 1024
+
+
+def resolve_db_path(db_name: str, data_folder: str = DATA_FOLDER) -> str:
+    """Databases live in the data folder unless given as ":memory:" or an absolute path."""
+    if db_name == ":memory:":
+        return db_name
+    if not os.path.exists(data_folder):
+        os.makedirs(data_folder)
+    return os.path.join(data_folder, db_name)
+
+
+def open_connection(db_name: str, read_only: bool = False, data_folder: str = DATA_FOLDER,
+                    check_same_thread: bool = True) -> sqlite3.Connection:
+    """
+    Open a database with the pragmas shared by the bot and the crawler. Writable
+    connections switch the file to WAL, so that readers are not blocked by a
+    writer in another process. Pass `check_same_thread=False` only if the
+    caller serializes access from several threads itself.
+    """
+    db_path = resolve_db_path(db_name, data_folder)
+    if read_only and db_path != ":memory:":
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True,
+                               check_same_thread=check_same_thread)
+    else:
+        conn = sqlite3.connect(db_path, check_same_thread=check_same_thread)
+    conn.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+    conn.execute(f'PRAGMA cache_size = -{CACHE_SIZE_KIB}')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    if read_only:
+        conn.execute('PRAGMA query_only = ON')
+    else:
+        conn.execute('PRAGMA journal_mode = WAL')
+        # A power loss may drop the last commits but cannot corrupt the file
+        conn.execute('PRAGMA synchronous = NORMAL')
+    return conn
@@ -0,0 +1,76 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Sequence
+
+from auto_duolingo.string_util import is_valid_sort
+from llm.translate_llm import llm_sort_substrings, llm_sort_substrings_2
+
+# Strategies raced by default, each called as strategy(sentence, substrings, max_attempts=1)
+SORT_STRATEGIES = (llm_sort_substrings, llm_sort_substrings_2)
+# LLM requests in flight at once
+MAX_CONCURRENCY = 4
+# Seconds after which a question gives up on the LLM tier
+DEADLINE_SECONDS = 15.0
+# LLM calls one race may start, each billed even if it loses
+MAX_CALLS_PER_RACE = 6
+
+# Not the loop's default executor, which asyncio.run waits for on exit: calls
+# dropped at the deadline may finish here in the background
+_executor = ThreadPoolExecutor(
+    max_workers=2 * MAX_CONCURRENCY, thread_name_prefix="llm")
+
+SortStrategy = Callable[..., List[str]]
+
+
+async def race_sort_substrings(original_sentence: str, substrings: List[str],
+                               strategies: Sequence[SortStrategy] = SORT_STRATEGIES,
+                               attempts: int = 1, max_concurrency: int = MAX_CONCURRENCY,
+                               deadline: float = DEADLINE_SECONDS) -> List[str]:
+    """
+    Run every strategy `attempts` times at once, at most `max_concurrency`
+    calls in flight, and return the first result that passes `is_valid_sort`.
+    The others are cancelled. Returns [] if none is valid before `deadline`.
+
+    The LLM clients are synchronous, so each call runs on a worker thread; a
+    call already sent is not interrupted, only its result is dropped, and it
+    is still billed. `attempts` is lowered so that a race starts at most
+    MAX_CALLS_PER_RACE calls.
+
+    Attempts of a strategy share its response cache entry. Only answers that
+    pass `is_valid_sort` are cached, so an attempt either replays a valid
+    answer or asks the model again.
+    """
+    attempts = max(1, min(attempts, MAX_CALLS_PER_RACE // max(1, len(strategies))))
+    semaphore = asyncio.Semaphore(max_concurrency)
+    loop = asyncio.get_running_loop()
+
+    async def attempt(strategy: SortStrategy) -> List[str]:
+        async with semaphore:
+            return await loop.run_in_executor(
+                _executor, lambda: strategy(original_sentence, substrings, max_attempts=1))
+
+    pending = {asyncio.ensure_future(attempt(strategy))
+               for strategy in strategies for _ in range(attempts)}
+    end = loop.time() + deadline
+    try:
+        while pending:
+            remaining = end - loop.time()
+            if remaining <= 0:
+                print("LLM deadline reached without a valid sort.")
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    print(f"LLM attempt failed: {task.exception()}")
+                elif is_valid_sort(task.result(), substrings):
+                    return task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+    return []
+
+
+def llm_race_sort_substrings(original_sentence: str, substrings: List[str], **kwargs) -> List[str]:
+    """Blocking wrapper of `race_sort_substrings` for callers outside an event loop."""
+    return asyncio.run(race_sort_substrings(original_sentence, substrings, **kwargs))
@@ -0,0 +1,41 @@
+import threading
+from typing import Any, Callable, Dict
+
+
+class ClientRegistry:
+    """
+    One LLM client per provider, per process, created on first use. A client
+    keeps its HTTP connection pool, so later calls reuse open TLS connections
+    instead of setting up new ones. Tests swap a provider's client with `set`.
+    """
+
+    def __init__(self, factories: Dict[str, Callable[[], Any]]):
+        self._factories = dict(factories)
+        self._clients: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider: str) -> Any:
+        client = self._clients.get(provider)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(provider)
+                if client is None:
+                    if provider not in self._factories:
+                        raise ValueError(f"Unknown LLM provider: {provider}")
+                    client = self._factories[provider]()
+                    self._clients[provider] = client
+        return client
+
+    def set(self, provider: str, client: Any):
+        """Use `client` for `provider` from now on, e.g. a local stand-in."""
+        with self._lock:
+            self._clients[provider] = client
+
+    def clear(self):
+        """Close and forget all clients; the next `get` creates new ones."""
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for client in clients.values():
+            close = getattr(client, "close", None)
+            if callable(close):
+                close()
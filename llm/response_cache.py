@@ -0,0 +1,154 @@
+import functools
+import hashlib
+import inspect
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from db.connection import DATA_FOLDER, open_connection
+
+# Answers older than this are asked again, in case the model has changed
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+# Least recently used entries beyond this are evicted
+DEFAULT_MAX_ENTRIES = 20000
+
+
+def normalize_input(value: Any) -> Any:
+    """Fold width forms (NFKC) and surrounding whitespace of strings, also inside lists."""
+    if isinstance(value, str):
+        return unicodedata.normalize('NFKC', value).strip()
+    if isinstance(value, (list, tuple)):
+        return [normalize_input(item) for item in value]
+    return value
+
+
+class ResponseCache:
+    """
+    Persistent cache of LLM answers, keyed on the function, the model name and
+    the normalized inputs. Entries expire after `ttl_seconds`; past
+    `max_entries` the least recently used are evicted. Only answers that are
+    not empty, and that pass the decorator's `validate`, are stored, so
+    failed calls are retried next time.
+
+    The cache may be used from several threads, as the async LLM layer does;
+    they share one connection behind a lock.
+    """
+
+    def __init__(self, db_name: str = 'llm_cache.db', ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, data_folder: str = DATA_FOLDER):
+        self.db_name = db_name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.data_folder = data_folder
+        self.hits = 0
+        self.misses = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = open_connection(
+                self.db_name, data_folder=self.data_folder, check_same_thread=False)
+            with self._conn:
+                self._conn.execute('''
+                    CREATE TABLE IF NOT EXISTS llm_responses (
+                        key TEXT PRIMARY KEY,
+                        function TEXT NOT NULL,
+                        response TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_used REAL NOT NULL
+                    )
+                ''')
+                self._conn.execute(
+                    'CREATE INDEX IF NOT EXISTS idx_llm_responses_last_used ON llm_responses(last_used)')
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @staticmethod
+    def make_key(function: str, model: str, inputs: Dict[str, Any]) -> str:
+        payload = json.dumps([function, model, normalize_input(list(inputs.items()))],
+                             ensure_ascii=False, sort_keys=True)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT response, created_at FROM llm_responses WHERE key = ?', (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl_seconds:
+                with self.conn:
+                    self.conn.execute(
+                        'DELETE FROM llm_responses WHERE key = ?', (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            with self.conn:
+                self.conn.execute(
+                    'UPDATE llm_responses SET last_used = ? WHERE key = ?', (now, key))
+        return json.loads(row[0])
+
+    def put(self, key: str, function: str, response: Any):
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute('''
+                INSERT INTO llm_responses (key, function, response, created_at, last_used)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE
+                SET response = excluded.response, created_at = excluded.created_at,
+                    last_used = excluded.last_used
+            ''', (key, function, json.dumps(response, ensure_ascii=False), now, now))
+            self.conn.execute('''
+                DELETE FROM llm_responses WHERE key IN (
+                    SELECT key FROM llm_responses ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+            ''', (self.max_entries,))
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def cached(self, model_name: Callable[[], str], ignore: Iterable[str] = ("max_attempts",),
+               validate: Optional[Callable[..., bool]] = None):
+        """
+        Decorate an LLM function so that its answers are served from the cache.
+        Arguments named in `ignore` do not change the answer and are left out
+        of the key. `validate(answer, **arguments)` decides whether an answer
+        is good enough to keep.
+        """
+        ignored = set(ignore)
+
+        def decorator(function: Callable[..., Any]) -> Callable[..., Any]:
+            signature = inspect.signature(function)
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                inputs = {name: value for name, value in bound.arguments.items()
+                          if name not in ignored}
+                key = self.make_key(function.__name__, model_name(), inputs)
+                response = self.get(key)
+                if response is not None:
+                    return response
+                response = function(*args, **kwargs)
+                if response and (validate is None or validate(response, **bound.arguments)):
+                    self.put(key, function.__name__, response)
+                return response
+
+            return wrapper
+
+        return decorator
+
+
+# Shared by the LLM functions in translate_llm
+response_cache = ResponseCache()
@@ -4,18 +4,24 @@ from typing import List
 from volcenginesdkarkruntime import Ark
 from zhipuai import ZhipuAI
 
-from auto_duolingo.string_util import sort_substrings
+from auto_duolingo.latency import latency
+from auto_duolingo.string_util import is_valid_sort, sort_substrings
 from config import ARK_API_KEY, ZHIPUAI_API_KEY
+from llm.client_registry import ClientRegistry
 from llm.lang_detect import detect_language
+from llm.response_cache import response_cache
 
 LLM_IN_USE = "ark"  # "zhipuai" or "ark"
 
+# Clients are created once per process and keep their connections open
+llm_clients = ClientRegistry({
+    "zhipuai": lambda: ZhipuAI(api_key=ZHIPUAI_API_KEY),
+    "ark": lambda: Ark(api_key=ARK_API_KEY),
+})
+
 
 def _llm_get_client():
-    if LLM_IN_USE == "zhipuai":
-        return ZhipuAI(api_key=ZHIPUAI_API_KEY)
-    elif LLM_IN_USE == "ark":
-        return Ark(api_key=ARK_API_KEY)
+    return llm_clients.get(LLM_IN_USE)
 
 
 def _llm_get_model_name():
@@ -25,6 +31,23 @@ def _llm_get_model_name():
         return "ep-20240629142039-bt9sd"
 
 
+def _llm_chat_completion(client, **kwargs):
+    with latency.measure("llm"):
+        return client.chat.completions.create(**kwargs)
+
+
+# Identical questions are answered from disk instead of the remote model.
+# Sorts are kept only if the tiles cover them, matches only if they use every option
+llm_cached = response_cache.cached(_llm_get_model_name)
+llm_cached_sort = response_cache.cached(
+    _llm_get_model_name,
+    validate=lambda response, substrings, **_: is_valid_sort(response, substrings))
+llm_cached_order = response_cache.cached(
+    _llm_get_model_name,
+    validate=lambda response, options, **_: sorted(response) == sorted(options))
+
+
+@llm_cached_sort
 def llm_sort_substrings(original_sentence: str, substrings: List[str], max_attempts=3) -> List[str]:
     original_language = detect_language(original_sentence)
     target_language = detect_language(' '.join(substrings))
@@ -63,7 +86,8 @@ def llm_sort_substrings(original_sentence: str, substrings: List[str], max_attem
 
     client = _llm_get_client()
     for attempt in range(max_attempts):
-        response = client.chat.completions.create(
+        response = _llm_chat_completion(
+            client,
             model=_llm_get_model_name(),
             messages=[
                 {"role": "system", "content": "You are a precise translation assistant."},
@@ -92,6 +116,7 @@ def llm_sort_substrings(original_sentence: str, substrings: List[str], max_attem
     return []
 
 
+@llm_cached_sort
 def llm_sort_substrings_2(original_sentence: str, substrings: List[str], max_attempts: int = 3) -> List[str]:
     original_language = detect_language(original_sentence)
     target_language = detect_language(' '.join(substrings))
@@ -115,7 +140,8 @@ def llm_sort_substrings_2(original_sentence: str, substrings: List[str], max_att
 
     client = _llm_get_client()
     for _ in range(max_attempts):
-        response = client.chat.completions.create(
+        response = _llm_chat_completion(
+            client,
             model=_llm_get_model_name(),
             messages=[
                 {"role": "system", "content": "You are a translation assistant."},
@@ -134,6 +160,7 @@ def llm_sort_substrings_2(original_sentence: str, substrings: List[str], max_att
     return []
 
 
+@llm_cached
 def llm_pick_semantically_matching_word(original_word: str, options: List[str]) -> str:
     print(f"Original word: {original_word}")
     print(f"Options: {options}")
@@ -148,7 +175,8 @@ def llm_pick_semantically_matching_word(original_word: str, options: List[str])
     )
 
     client = _llm_get_client()
-    response = client.chat.completions.create(
+    response = _llm_chat_completion(
+        client,
         model=_llm_get_model_name(),
         messages=[{"role": "user", "content": prompt}],
         temperature=0
@@ -164,6 +192,7 @@ def llm_pick_semantically_matching_word(original_word: str, options: List[str])
         return None
 
 
+@llm_cached
 def llm_pick_corresponding_pronunciation(original_word: str, options: List[str]) -> str:
     print(f"Original word: {original_word}")
     print(f"Options: {options}")
@@ -181,7 +210,8 @@ def llm_pick_corresponding_pronunciation(original_word: str, options: List[str])
     )
 
     client = _llm_get_client()
-    response = client.chat.completions.create(
+    response = _llm_chat_completion(
+        client,
         model=_llm_get_model_name(),
         messages=[{"role": "user", "content": prompt}],
     )
@@ -196,6 +226,7 @@ def llm_pick_corresponding_pronunciation(original_word: str, options: List[str])
         return None
 
 
+@llm_cached_order
 def llm_sort_translations_by_original_order(original_words: List[str], options: List[str]) -> List[str]:
     print(f"original_words: {original_words}")
     print(f"options: {options}")
@@ -216,7 +247,8 @@ def llm_sort_translations_by_original_order(original_words: List[str], options:
     )
 
     client = _llm_get_client()
-    response = client.chat.completions.create(
+    response = _llm_chat_completion(
+        client,
         model=_llm_get_model_name(),
         messages=[
             {"role": "user", "content": prompt},
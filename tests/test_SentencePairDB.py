@@ -1,7 +1,11 @@
 import os
+import sqlite3
 import unittest
+from unittest.mock import patch
 
-from db.SentencePairDB import SentencePairDB
+from auto_duolingo.write_behind import WriteBehind
+from db.ConnectionManager import ConnectionManager
+from db.SentencePairDB import LookupTier, SentencePairDB, normalize_sentence
 
 
 class TestSentencePairDB(unittest.TestCase):
@@ -125,6 +129,166 @@ class TestSentencePairDB(unittest.TestCase):
         self.assertIsNone(
             result, "Incorrectly matched sentences differing by more than punctuation.")
 
+    def test_get_complementary_sentence_without_punctuation(self):
+        """Punctuation missing from the middle of the query is ignored too."""
+        self.db.insert_sentence_pair("ワンさん、おはようございます。", "小王，早上好。")
+        self.assertEqual(self.db.get_complementary_sentence(
+            "ワンさんおはようございます"), "小王，早上好。")
+        self.assertEqual(self.db.get_complementary_sentence(
+            "小王早上好"), "ワンさん、おはようございます。")
+
+    def test_index_follows_inserts(self):
+        """Pairs inserted after the index is loaded are found without reloading it."""
+        self.assertIsNone(self.db.get_complementary_sentence("雨です。"))
+        self.db.insert_sentence_pair("雨です。", "下雨了。")
+        self.assertEqual(self.db.get_complementary_sentence("雨です"), "下雨了。")
+
+    def test_get_complementary_sentence_folds_width_and_spacing(self):
+        self.db.insert_sentence_pair("ＴＶを 見ます。", "看电视。")
+        self.assertEqual(self.db.get_complementary_sentence("TVを見ます"), None)
+        self.assertEqual(self.db.get_complementary_sentence("TVを  見ます"), "看电视。")
+
+    def test_cached_and_indexed_lookups_agree(self):
+        self.db.insert_sentence_pair("立ち入り禁止。", "禁止入内。")
+        self.db.insert_sentence_pair("立ち入り、禁止！", "不许进。")
+        cached = SentencePairDB(self.test_db_name, cache_sentences=True)
+        for query in ["立ち入り禁止", "立ち入り、禁止", "禁止入内", "禁止"]:
+            self.assertEqual(cached.get_complementary_sentence(query),
+                             self.db.get_complementary_sentence(query), query)
+        cached.close()
+
+    def test_migrate_backfills_normalized_columns(self):
+        """Databases created before the normalized columns existed are migrated on open."""
+        self.db.close()
+        os.remove(self.test_db_path)
+        conn = sqlite3.connect(self.test_db_path)
+        conn.execute('''
+        CREATE TABLE sentence_pairs (
+            id INTEGER PRIMARY KEY,
+            original_sentence TEXT NOT NULL,
+            translated_sentence TEXT NOT NULL,
+            source TEXT
+        )
+        ''')
+        conn.execute("INSERT INTO sentence_pairs (original_sentence, translated_sentence) VALUES (?, ?)",
+                     ("おはよう、ございます。", "早上好！"))
+        conn.commit()
+        conn.close()
+
+        self.db = SentencePairDB(self.test_db_name)
+        row = self.db.conn.execute(
+            'SELECT original_normalized, translated_normalized FROM sentence_pairs').fetchone()
+        self.assertEqual(row, ("おはようございます", "早上好"))
+        self.assertEqual(self.db.get_complementary_sentence("早上好"), "おはよう、ございます。")
+
+    def test_read_only_lookup_without_migration(self):
+        """A read-only open of an old database computes the normalized columns without writing them."""
+        self.db.close()
+        os.remove(self.test_db_path)
+        conn = sqlite3.connect(self.test_db_path)
+        conn.execute('''
+        CREATE TABLE sentence_pairs (
+            id INTEGER PRIMARY KEY,
+            original_sentence TEXT NOT NULL,
+            translated_sentence TEXT NOT NULL,
+            source TEXT
+        )
+        ''')
+        conn.execute("INSERT INTO sentence_pairs (original_sentence, translated_sentence) VALUES (?, ?)",
+                     ("おはよう、ございます。", "早上好！"))
+        conn.commit()
+        conn.close()
+
+        for cache_sentences in (False, True):
+            self.db = SentencePairDB(self.test_db_name, cache_sentences=cache_sentences, read_only=True)
+            self.assertEqual(self.db.get_complementary_sentence("早上好"), "おはよう、ございます。")
+            self.db.close()
+        conn = sqlite3.connect(self.test_db_path)
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(sentence_pairs)')}
+        conn.close()
+        self.assertNotIn('original_normalized', columns)
+
+    def test_lookup_sentence_tiers(self):
+        self.db.insert_sentence_pair("今晩雪が降ります。", "今晚，下雪。")
+        fuzzy = SentencePairDB(self.test_db_name, fuzzy_search=True)
+        self.assertEqual(fuzzy.lookup_sentence("今晩雪が降ります").tier, LookupTier.EXACT)
+        self.assertEqual(tuple(fuzzy.lookup_sentence("今晩雪が降りました")),
+                         ("今晚，下雪。", LookupTier.FUZZY, 2))
+        self.assertEqual(fuzzy.lookup_sentence("今晩雪が降りました", max_distance=1).tier,
+                         LookupTier.MISS)
+        self.assertEqual(fuzzy.lookup_sentence("明日は晴れです").tier, LookupTier.MISS)
+        fuzzy.close()
+
+    def test_fuzzy_index_follows_inserts(self):
+        fuzzy = SentencePairDB(self.test_db_name, fuzzy_search=True)
+        fuzzy.insert_sentence_pair("私は学生です。", "我是学生。")
+        matches = fuzzy.find_similar_sentences("我是学生吗")
+        self.assertEqual([(match.counterpart, match.distance) for match in matches],
+                         [("私は学生です。", 1)])
+        # Without fuzzy search there is no fuzzy tier
+        self.assertEqual(self.db.lookup_sentence("我是学生吗").tier, LookupTier.MISS)
+        fuzzy.close()
+
+    def test_insert_many(self):
+        self.db.insert_sentence_pair("はい。", "是的。")
+        inserted, updated = self.db.insert_many([
+            ("はい。", "是的。", ""),
+            ("いいえ。", "不是。", ""),
+            ("いいえ。", "不是。", ""),
+            ("", "空", ""),
+        ])
+        self.assertEqual((inserted, updated), (1, 0))
+        self.assertEqual(len(self.db.fetch_all_sentence_pairs()), 2)
+
+        # Only an incorrect_answer source overwrites an existing pair
+        self.assertEqual(self.db.insert_many(
+            [("はい。", "是的。", "incorrect_answer"), ("いいえ。", "不是。", "crawler")]), (0, 1))
+        sources = {original: source for original, _, source,
+                   _ in self.db.fetch_all_sentence_pairs()}
+        self.assertEqual(sources, {"はい。": "incorrect_answer", "いいえ。": ""})
+
+    def test_insert_many_updates_loaded_index(self):
+        cached = SentencePairDB(self.test_db_name, cache_sentences=True)
+        self.assertIsNone(cached.get_complementary_sentence("ありがとう"))
+        cached.insert_many([("ありがとう！", "谢谢！", "")])
+        self.assertEqual(cached.get_complementary_sentence("ありがとう"), "谢谢！")
+        cached.close()
+
+    def test_write_behind_insert_is_found_exactly(self):
+        db = SentencePairDB(self.test_db_name, cache_sentences=True)
+        # Loaded before the pair is written through the writer's own connection
+        self.assertEqual(db.sentence_index, {})
+        writer = WriteBehind(lambda: ConnectionManager(self.test_db_name),
+                             index_sentence_pair=db.index_sentence_pair)
+        writer.insert_sentence_pair("ねこがすきです。", "我喜欢猫。")
+        self.assertTrue(writer.flush(timeout=5))
+        writer.close()
+        self.assertEqual(db.lookup_sentence("ねこがすきです"),
+                         ("我喜欢猫。", LookupTier.EXACT, 0))
+        self.assertEqual(db.fetch_all_sentence_pairs()[0][:2], ("ねこがすきです。", "我喜欢猫。"))
+        db.close()
+
+    def test_migrate_drops_duplicate_pairs(self):
+        self.db.conn.execute('DROP INDEX idx_sentence_pair')
+        self.db.conn.executemany(
+            "INSERT INTO sentence_pairs (original_sentence, translated_sentence, source) VALUES (?, ?, ?)",
+            [("はい。", "是的。", ""), ("はい。", "是的。", "incorrect_answer"), ("はい。", "是的。", ""),
+             ("いいえ。", "不是。", ""), ("いいえ。", "不是。", "")])
+        self.db.conn.commit()
+        with patch('builtins.print') as mock_print:
+            self.db.migrate_unique_pairs()
+        mock_print.assert_called_once_with("Removed 3 duplicate sentence pairs.")
+        rows = self.db.conn.execute(
+            'SELECT original_sentence, source, id FROM sentence_pairs ORDER BY id').fetchall()
+        self.assertEqual(rows, [("はい。", "incorrect_answer", 2), ("いいえ。", "", 5)])
+
+
+class TestNormalizeSentence(unittest.TestCase):
+    def test_normalize_sentence(self):
+        self.assertEqual(normalize_sentence("Ｈｅｌｌｏ,  world！"), "Hello world")
+        self.assertEqual(normalize_sentence("ｶﾀｶﾅ です。"), "カタカナ です")
+        self.assertEqual(normalize_sentence(" 。"), "")
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -80,6 +80,30 @@ class TestWordPairsDB(unittest.TestCase):
         self.assertEqual(matches['cat'], 'dog')
         self.assertEqual(matches['elephant'], 'crane')
 
+    def test_find_matches_batched(self):
+        # Pairs are found in either column; ties go to the earliest option
+        self.db.insert_many([('たいせつ', '重要'), ('たいせつ', '大切'), ('象', 'ゾウ')])
+        matches = self.db.find_matches(
+            ['たいせつ', 'ゾウ', 'ねこ'], ['大切', '象', '重要'])
+        self.assertEqual(matches, {'たいせつ': '大切', 'ゾウ': '象', 'ねこ': None})
+        self.assertEqual(self.db.find_matches(['ゾウ'], []), {'ゾウ': None})
+
+    def test_find_matches_with_graph(self):
+        # The graph also links words through a shared counterpart
+        db = WordPairsDB(conn=self.db.conn, use_graph=True)
+        self.db.insert_word_pair(('せんせい', '先生'))
+        self.assertEqual(db.find_matches(['先生'], ['老师']), {'先生': None})
+        db.insert_many([('せんせい', '老师')])
+        self.assertEqual(db.find_matches(['先生'], ['老师']), {'先生': '老师'})
+
+    def test_insert_many(self):
+        # Pairs already stored, in either order, are not counted again
+        self.db.insert_word_pair(('sun', 'moon'))
+        inserted = self.db.insert_many(
+            [('moon', 'sun'), ('star', 'sky'), ('sky', 'star'), ('rain', 'snow')])
+        self.assertEqual(inserted, 2)
+        self.assertEqual(self.db.query_related_words('sky'), ['star'])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+from db.AnswerCache import AnswerCache, question_fingerprint
+from db.connection import open_connection
+
+
+class TestAnswerCache(unittest.TestCase):
+    def setUp(self):
+        self.conn = open_connection(':memory:')
+        self.cache = AnswerCache(conn=self.conn)
+        self.fingerprint = question_fingerprint(
+            'CHOOSE_CORRECT_TRANSLATION', '猫', ['狗', '猫咪'])
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_fingerprint_ignores_option_order(self):
+        self.assertEqual(self.fingerprint, question_fingerprint(
+            'CHOOSE_CORRECT_TRANSLATION', '猫', ['猫咪', '狗']))
+        self.assertNotEqual(self.fingerprint, question_fingerprint(
+            'HOW_TO_PRONOUNCE', '猫', ['猫咪', '狗']))
+
+    def test_ungraded_answer_is_not_served(self):
+        self.cache.put(self.fingerprint, 'CHOOSE_CORRECT_TRANSLATION', ['猫咪'])
+        self.assertIsNone(self.cache.get(self.fingerprint))
+        self.cache.record_status(self.fingerprint, 'unknown')
+        self.assertIsNone(self.cache.get(self.fingerprint))
+        self.assertIsNone(AnswerCache(conn=self.conn).get(self.fingerprint))
+
+    def test_put_and_get(self):
+        self.assertIsNone(self.cache.get(self.fingerprint))
+        self.cache.put(self.fingerprint, 'CHOOSE_CORRECT_TRANSLATION', ['猫咪'])
+        self.cache.record_status(self.fingerprint, 'correct')
+        self.assertEqual(self.cache.get(self.fingerprint), ['猫咪'])
+        # Entries survive a reload from the database
+        self.assertEqual(AnswerCache(conn=self.conn).get(self.fingerprint), ['猫咪'])
+
+    def test_correct_answer_is_kept(self):
+        self.cache.put(self.fingerprint, 'CHOOSE_CORRECT_TRANSLATION', ['猫咪'])
+        self.cache.record_status(self.fingerprint, 'correct')
+        self.assertEqual(self.conn.execute('SELECT status FROM answer_cache').fetchone(),
+                         ('correct',))
+
+    def test_incorrect_answer_is_evicted(self):
+        self.cache.put(self.fingerprint, 'CHOOSE_CORRECT_TRANSLATION', ['狗'])
+        self.cache.record_status(self.fingerprint, 'incorrect')
+        self.assertIsNone(self.cache.get(self.fingerprint))
+        self.assertIsNone(AnswerCache(conn=self.conn).get(self.fingerprint))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from db.AnswerSnapshot import AnswerSnapshot, export_snapshot
+from db.connection import open_connection
+from db.SentencePairDB import LookupTier, SentencePairDB
+from db.WordPairsDB import WordPairsDB
+
+
+class TestAnswerSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'answers.snapshot')
+        conn = open_connection(':memory:')
+        sentence_pair_db = SentencePairDB(conn=conn)
+        sentence_pair_db.insert_many([("おはようございます。", "早上好。", ""),
+                                      ("ねこがすきです", "我喜欢猫", "")])
+        WordPairsDB(conn=conn).insert_many([('ねこ', '猫'), ('いぬ', '狗'), ('ねこ', '貓')])
+        self.counts = export_snapshot(conn, self.path)
+        conn.close()
+        self.snapshot = AnswerSnapshot(self.path)
+
+    def tearDown(self):
+        self.snapshot.close()
+        shutil.rmtree(self.folder)
+
+    def test_counts(self):
+        # Each sentence is keyed on both sides
+        self.assertEqual(self.counts, (4, 5))
+
+    def test_lookup_sentence(self):
+        self.assertEqual(self.snapshot.lookup_sentence("おはようございます").counterpart, "早上好。")
+        self.assertEqual(self.snapshot.lookup_sentence("我喜欢猫！").counterpart, "ねこがすきです")
+        self.assertEqual(self.snapshot.lookup_sentence("こんばんは").tier, LookupTier.MISS)
+
+    def test_find_matches(self):
+        self.assertEqual(sorted(self.snapshot.query_related_words('ねこ')), ['猫', '貓'])
+        self.assertEqual(self.snapshot.find_matches(['猫', 'いぬ', 'とり'], ['狗', 'ねこ']),
+                         {'猫': 'ねこ', 'いぬ': '狗', 'とり': None})
+
+    def test_find_matches_through_two_pairs(self):
+        conn = open_connection(':memory:')
+        SentencePairDB(conn=conn)
+        word_pairs_db = WordPairsDB(conn=conn, use_graph=True)
+        word_pairs_db.insert_many([('ねこ', '猫'), ('ネコ', 'ねこ'), ('いぬ', '狗')])
+        export_snapshot(conn, self.path)
+        snapshot = AnswerSnapshot(self.path)
+        words, options = ['ネコ', 'いぬ'], ['狗', '猫']
+        self.assertEqual(snapshot.find_matches(words, options), {'ネコ': '猫', 'いぬ': '狗'})
+        self.assertEqual(snapshot.find_matches(words, options),
+                         word_pairs_db.find_matches(words, options))
+        snapshot.close()
+        conn.close()
+
+    def test_rejects_nul_in_text(self):
+        conn = open_connection(':memory:')
+        SentencePairDB(conn=conn)
+        WordPairsDB(conn=conn).insert_many([('ね\0こ', '猫')])
+        with self.assertRaises(ValueError):
+            export_snapshot(conn, os.path.join(self.folder, 'nul.snapshot'))
+        conn.close()
+
+    def test_rejects_other_files(self):
+        with open(self.path, 'wb') as file:
+            file.write(b'\0' * 64)
+        with self.assertRaises(ValueError):
+            AnswerSnapshot(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import shutil
+import tempfile
+import time
+import unittest
+
+from auto_duolingo.string_util import is_valid_sort
+from llm.async_llm import MAX_CALLS_PER_RACE, llm_race_sort_substrings
+from llm.response_cache import ResponseCache
+
+SENTENCE = "我喜欢猫"
+SUBSTRINGS = ['猫', '我', '喜欢', '狗']
+
+
+def invalid_strategy(original_sentence, substrings, max_attempts=3):
+    return ['我', '爱', '猫']
+
+
+def slow_strategy(original_sentence, substrings, max_attempts=3):
+    time.sleep(1)
+    return ['我', '喜欢', '狗']
+
+
+def fast_strategy(original_sentence, substrings, max_attempts=3):
+    return ['我', '喜欢', '猫']
+
+
+def failing_strategy(original_sentence, substrings, max_attempts=3):
+    raise RuntimeError("network down")
+
+
+class TestRaceSortSubstrings(unittest.TestCase):
+    def test_first_valid_result_wins(self):
+        start = time.monotonic()
+        result = llm_race_sort_substrings(
+            SENTENCE, SUBSTRINGS,
+            strategies=[slow_strategy, invalid_strategy, failing_strategy, fast_strategy])
+        self.assertEqual(['我', '喜欢', '猫'], result)
+        # The slow strategy is not waited for
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_deadline(self):
+        start = time.monotonic()
+        result = llm_race_sort_substrings(
+            SENTENCE, SUBSTRINGS, strategies=[slow_strategy], deadline=0.1)
+        self.assertEqual([], result)
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_no_valid_result(self):
+        self.assertEqual([], llm_race_sort_substrings(
+            SENTENCE, SUBSTRINGS, strategies=[invalid_strategy], attempts=3))
+
+    def test_calls_are_capped(self):
+        calls = []
+
+        def counted_strategy(original_sentence, substrings, max_attempts=3):
+            calls.append(original_sentence)
+            return []
+
+        llm_race_sort_substrings(SENTENCE, SUBSTRINGS,
+                                 strategies=[counted_strategy] * 2, attempts=10)
+        self.assertEqual(MAX_CALLS_PER_RACE, len(calls))
+
+    def test_cached_attempts_ask_again_after_an_invalid_answer(self):
+        data_folder = tempfile.mkdtemp()
+        cache = ResponseCache('test_llm_cache.db', data_folder=data_folder)
+        answers = [['我', '爱', '猫'], ['我', '喜欢', '猫']]
+
+        @cache.cached(lambda: "model-a",
+                      validate=lambda response, substrings, **_: is_valid_sort(response, substrings))
+        def flaky_strategy(original_sentence, substrings, max_attempts=3):
+            return answers.pop(0)
+
+        try:
+            result = llm_race_sort_substrings(SENTENCE, SUBSTRINGS, strategies=[flaky_strategy],
+                                              attempts=2, max_concurrency=1)
+            self.assertEqual(['我', '喜欢', '猫'], result)
+            self.assertEqual([], answers)
+        finally:
+            cache.close()
+            shutil.rmtree(data_folder)
+
+
+if __name__ == '__main__':
+    unittest.main()
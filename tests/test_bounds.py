@@ -0,0 +1,39 @@
+import unittest
+
+from auto_duolingo.ui_helper.Bounds import Bounds, sort_by_rows
+
+
+class TestBounds(unittest.TestCase):
+    def test_from_str(self):
+        bounds = Bounds.from_str("[42,2179][1038,2316]")
+        self.assertEqual(Bounds(42, 2179, 1038, 2316), bounds)
+        self.assertEqual(996, bounds.width)
+        self.assertEqual(137, bounds.height)
+
+    def test_center(self):
+        self.assertEqual((540, 2247), Bounds(42, 2179, 1038, 2316).center)
+
+    def test_contains(self):
+        bounds = Bounds(0, 0, 100, 50)
+        self.assertTrue(bounds.contains(0, 0))
+        self.assertTrue(bounds.contains(99, 49))
+        self.assertFalse(bounds.contains(100, 10))
+
+    def test_intersects(self):
+        bounds = Bounds(0, 0, 100, 100)
+        self.assertTrue(bounds.intersects(Bounds(50, 50, 150, 150)))
+        self.assertFalse(bounds.intersects(Bounds(100, 0, 200, 100)))
+
+    def test_hashable(self):
+        self.assertEqual(1, len({Bounds(1, 2, 3, 4), Bounds(1, 2, 3, 4)}))
+
+    def test_sort_by_rows(self):
+        first_row_right = Bounds(500, 102, 600, 180)
+        first_row_left = Bounds(100, 100, 200, 180)
+        second_row = Bounds(50, 300, 150, 380)
+        self.assertEqual([first_row_left, first_row_right, second_row],
+                         sort_by_rows([second_row, first_row_right, first_row_left]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+from llm.client_registry import ClientRegistry
+
+
+class StubClient:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class TestClientRegistry(unittest.TestCase):
+    def setUp(self):
+        self.created = []
+
+        def factory():
+            client = StubClient()
+            self.created.append(client)
+            return client
+
+        self.registry = ClientRegistry({"ark": factory})
+
+    def test_client_is_created_once(self):
+        self.assertIs(self.registry.get("ark"), self.registry.get("ark"))
+        self.assertEqual(len(self.created), 1)
+
+    def test_set_replaces_the_client(self):
+        stand_in = object()
+        self.registry.set("ark", stand_in)
+        self.assertIs(self.registry.get("ark"), stand_in)
+        self.assertEqual(self.created, [])
+
+    def test_clear_closes_clients(self):
+        client = self.registry.get("ark")
+        self.registry.clear()
+        self.assertTrue(client.closed)
+        self.assertIsNot(self.registry.get("ark"), client)
+
+    def test_unknown_provider(self):
+        with self.assertRaises(ValueError):
+            self.registry.get("zhipuai")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from db.ConnectionManager import ConnectionManager
+from db.connection import open_connection
+
+
+class TestConnectionManager(unittest.TestCase):
+    def setUp(self):
+        self.data_folder = tempfile.mkdtemp()
+        self.databases = ConnectionManager(
+            'test.db', data_folder=self.data_folder)
+
+    def tearDown(self):
+        self.databases.close()
+        shutil.rmtree(self.data_folder)
+
+    def test_databases_are_shared(self):
+        self.assertIs(self.databases.sentence_pair_db(),
+                      self.databases.sentence_pair_db())
+        self.assertIs(self.databases.word_pairs_db().conn,
+                      self.databases.sentence_pair_db().conn)
+
+    def test_closing_a_database_keeps_the_shared_connection(self):
+        self.databases.word_pairs_db().close()
+        self.databases.sentence_pair_db().insert_sentence_pair("はい。", "是的。")
+        self.assertEqual(
+            self.databases.sentence_pair_db().get_complementary_sentence("はい"), "是的。")
+
+    def test_preload_loads_indexes(self):
+        self.databases.preload()
+        self.assertIsNotNone(self.databases.sentence_pair_db()._sentence_index)
+        self.assertIsNotNone(self.databases.word_pairs_db()._word_graph)
+
+    def test_fuzzy_index_is_opt_in(self):
+        def has_fts(databases):
+            return databases.connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'sentence_pairs_fts'").fetchone() is not None
+
+        self.databases.sentence_pair_db().insert_sentence_pair("はい。", "是的。")
+        self.assertFalse(self.databases.sentence_pair_db().fuzzy_search)
+        self.assertFalse(has_fts(self.databases))
+
+        fuzzy = ConnectionManager('test.db', data_folder=self.data_folder, fuzzy_search=True)
+        self.assertTrue(fuzzy.sentence_pair_db().fuzzy_search)
+        self.assertTrue(has_fts(fuzzy))
+        fuzzy.close()
+
+    def test_wal_mode(self):
+        mode = self.databases.connection.execute(
+            'PRAGMA journal_mode').fetchone()[0]
+        self.assertEqual(mode, 'wal')
+
+    def test_read_only(self):
+        self.databases.sentence_pair_db().insert_sentence_pair("はい。", "是的。")
+        self.databases.word_pairs_db().insert_word_pair(('ねこ', '猫'))
+
+        reader = ConnectionManager(
+            'test.db', read_only=True, data_folder=self.data_folder)
+        self.assertEqual(
+            reader.sentence_pair_db().get_complementary_sentence("是的"), "はい。")
+        self.assertEqual(reader.word_pairs_db().find_matches(
+            ['ねこ'], ['猫']), {'ねこ': '猫'})
+        with self.assertRaises(sqlite3.OperationalError):
+            reader.sentence_pair_db().insert_sentence_pair("いいえ。", "不是。")
+        reader.close()
+
+    def test_reader_is_not_blocked_by_writer(self):
+        sentence_pair_db = self.databases.sentence_pair_db()
+        sentence_pair_db.insert_sentence_pair("はい。", "是的。")
+        writer = open_connection('test.db', data_folder=self.data_folder)
+        writer.execute('BEGIN IMMEDIATE')
+        writer.execute(
+            "INSERT INTO sentence_pairs (original_sentence, translated_sentence) VALUES ('a', 'b')")
+        # The uncommitted write is invisible but does not lock the reader out
+        self.assertEqual(len(sentence_pair_db.fetch_all_sentence_pairs()), 1)
+        writer.rollback()
+        writer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
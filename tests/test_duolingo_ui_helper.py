@@ -1,13 +1,22 @@
+import time
 import unittest
 from unittest.mock import MagicMock, patch
 
-from auto_duolingo.ui_helper.DuolingoUIHelper import DuolingoUIHelper
+from auto_duolingo.latency import latency
+from auto_duolingo.ui_helper.Bounds import Bounds
+from auto_duolingo.ui_helper.DuolingoUIHelper import (
+    STABLE_SCREEN_MAX_DELAY,
+    STABLE_SCREEN_MIN_DELAY,
+    DuolingoUIHelper,
+)
+from tests.test_screen_snapshot import load_hierarchy, load_snapshot
 
 
 class TestDuolingoUIHelper(unittest.TestCase):
     def setUp(self):
         patcher1 = patch(
-            'tools.adb_utils.get_device_id', return_value='dummy_device_id')
+            'auto_duolingo.ui_helper.DuolingoUIHelper.get_device_id',
+            return_value='dummy_device_id')
         self.mock_get_device_id = patcher1.start()
         self.addCleanup(patcher1.stop)
 
@@ -18,6 +27,103 @@ class TestDuolingoUIHelper(unittest.TestCase):
 
         self.helper = DuolingoUIHelper()
 
+    def test_unchanged_dump_reuses_snapshot(self):
+        self.helper.d.dump_hierarchy.return_value = load_hierarchy(
+            "CHOOSE_MATCHING_PAIR")
+        first = self.helper.get_current_screen()
+        second = self.helper.get_current_screen()
+        self.assertIs(first, second)
+
+    def test_changed_dump_is_parsed_again(self):
+        self.helper.d.dump_hierarchy.return_value = load_hierarchy(
+            "CHOOSE_MATCHING_PAIR")
+        first = self.helper.get_current_screen()
+        self.helper.d.dump_hierarchy.return_value = load_hierarchy("WRONG")
+        second = self.helper.get_current_screen()
+        self.assertIsNot(first, second)
+
+    def test_parse_is_recorded_once_per_snapshot(self):
+        latency.reset()
+        self.helper.d.dump_hierarchy.side_effect = [
+            load_hierarchy("CHOOSE_MATCHING_PAIR"),
+            load_hierarchy("CHOOSE_MATCHING_PAIR"),
+            load_hierarchy("WRONG"),
+        ]
+        for _ in range(3):
+            self.helper.get_current_screen().has("com.duolingo:id/title")
+        self.assertEqual(1, latency.summary()["stages"]["parse"]["count"])
+        self.helper.record_parse()
+        self.helper.record_parse()
+        self.assertEqual(2, latency.summary()["stages"]["parse"]["count"])
+
+    def test_stable_screen_delay_grows(self):
+        self.helper._stable_since = time.monotonic()
+        self.assertEqual(STABLE_SCREEN_MIN_DELAY,
+                         self.helper.stable_screen_delay())
+        self.helper._stable_since = time.monotonic() - 60
+        self.assertEqual(STABLE_SCREEN_MAX_DELAY,
+                         self.helper.stable_screen_delay())
+
+    @patch('time.sleep')
+    def test_wait_for_any_returns_matching_snapshot(self, mock_sleep):
+        self.helper.d.dump_hierarchy.side_effect = [
+            load_hierarchy("TRANSLATE_JPN_TO_CHI"),
+            load_hierarchy("TRANSLATE_JPN_TO_CHI"),
+            load_hierarchy("WRONG"),
+        ]
+        screen = self.helper.wait_for_any(
+            ["com.duolingo:id/noHeartsTitle", "com.duolingo:id/ribbonPrimaryTitle"])
+        self.assertTrue(screen.has("com.duolingo:id/ribbonPrimaryTitle"))
+        self.assertEqual(3, self.helper.d.dump_hierarchy.call_count)
+        # Polls faster at first
+        delays = [call.args[0] for call in mock_sleep.call_args_list]
+        self.assertEqual(sorted(delays), delays)
+
+    @patch('time.sleep')
+    def test_wait_for_any_times_out(self, mock_sleep):
+        self.helper.d.dump_hierarchy.return_value = load_hierarchy(
+            "TRANSLATE_JPN_TO_CHI")
+        self.assertIsNone(self.helper.wait_for_any(
+            ["com.duolingo:id/ribbonPrimaryTitle"], timeout=0))
+
+    @patch('time.sleep')
+    def test_click_element_if_exists_uses_given_screen(self, mock_sleep):
+        screen = load_snapshot("NO_HEARTS")
+        clicked = self.helper.click_element_if_exists(
+            ["com.duolingo:id/tooltip", "com.duolingo:id/continueButtonRed"], screen)
+        self.assertTrue(clicked)
+        self.helper.d.click.assert_called_once_with(540, 2247)
+        self.helper.d.dump_hierarchy.assert_not_called()
+
+    @patch('time.sleep')
+    def test_click_elements_sequentially_dumps_once_per_element(self, mock_sleep):
+        self.helper.d.dump_hierarchy.return_value = load_hierarchy("NO_HEARTS")
+        self.helper.click_elements_sequentially(
+            ["com.duolingo:id/disableListenButton", "com.duolingo:id/continueButtonRed"])
+        self.helper.d.click.assert_called_once_with(540, 2247)
+        self.assertEqual(2, self.helper.d.dump_hierarchy.call_count)
+
+    def test_batched_taps_use_one_shell_call(self):
+        self.helper.d.shell.return_value = MagicMock(exit_code=0)
+        self.helper.perform_clicks_by_bounds(
+            [Bounds(0, 0, 10, 10), Bounds(100, 0, 120, 10)], interval=0.05)
+        self.helper.d.shell.assert_called_once_with(
+            "input tap 5 5; sleep 0.05; input tap 110 5; sleep 0.05")
+        self.helper.d.click.assert_not_called()
+
+    @patch('time.sleep')
+    def test_single_tap_is_not_batched(self, mock_sleep):
+        self.helper.perform_clicks_by_bounds([Bounds(0, 0, 10, 10)])
+        self.helper.d.click.assert_called_once_with(5, 5)
+        self.helper.d.shell.assert_not_called()
+
+    @patch('time.sleep')
+    def test_batched_taps_fall_back_when_shell_fails(self, mock_sleep):
+        self.helper.d.shell.side_effect = RuntimeError("device offline")
+        self.helper.perform_clicks_by_bounds(
+            [Bounds(0, 0, 10, 10), Bounds(100, 0, 120, 10)])
+        self.assertEqual(2, self.helper.d.click.call_count)
+
 
 if __name__ == '__main__':
     unittest.main()
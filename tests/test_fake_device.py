@@ -0,0 +1,78 @@
+import os
+import unittest
+from unittest.mock import patch
+
+from auto_duolingo.logger import INCORRECT_ANSWERS_LOG
+from benchmark.simulate import QUESTIONS_PER_LESSON, simulate
+from db.ConnectionManager import DEFAULT_DB_NAME
+from db.connection import DATA_FOLDER
+from tools.FakeDevice import FakeDevice, FakeScreen, ScriptFinished, load_hierarchy
+
+SUBMIT = ("com.duolingo:id/submitButton",)
+
+
+class TestFakeDevice(unittest.TestCase):
+    def setUp(self):
+        self.device = FakeDevice([
+            FakeScreen(load_hierarchy("CHOOSE_CORRECT_TRANSLATION"), SUBMIT),
+            FakeScreen(load_hierarchy("WRONG")),
+        ])
+
+    def test_dump_serves_current_screen(self):
+        self.assertIn("选择正确的翻译", self.device.dump_hierarchy())
+        self.assertEqual(1, self.device.calls["dump_hierarchy"])
+
+    def test_tap_outside_trigger_does_not_advance(self):
+        self.device.click(1, 1)
+        self.assertEqual(0, self.device.position)
+        self.assertEqual([(1, 1)], self.device.taps)
+
+    def test_selector_click_advances(self):
+        self.assertTrue(self.device(resourceId=SUBMIT[0]).exists)
+        self.device(resourceId=SUBMIT[0]).click()
+        self.assertEqual(1, self.device.position)
+        self.assertIn("ribbonPrimaryTitle", self.device.dump_hierarchy())
+
+    def test_selector_with_text(self):
+        self.assertFalse(self.device(
+            resourceId="com.duolingo:id/optionText", text="nothing").exists)
+        self.assertTrue(self.device(
+            resourceId="com.duolingo:id/optionText", text="通訳").exists)
+
+    def test_shell_taps(self):
+        submit = self.device(resourceId=SUBMIT[0])._element()
+        x, y = (int(n) for n in submit.get("bounds")[1:].split("]")[0].split(","))
+        response = self.device.shell(f"input tap 1 1; sleep 0; input tap {x} {y}")
+        self.assertEqual(0, response.exit_code)
+        self.assertEqual(1, self.device.position)
+        self.assertNotEqual(0, self.device.shell("reboot").exit_code)
+
+    def test_script_finished(self):
+        self.device(resourceId=SUBMIT[0]).click()
+        self.device._advance()
+        with self.assertRaises(ScriptFinished):
+            self.device.dump_hierarchy()
+
+    def test_loop(self):
+        device = FakeDevice([FakeScreen(load_hierarchy("WRONG"))], loop=True)
+        device._advance()
+        self.assertEqual(0, device.position)
+
+
+class TestSimulation(unittest.TestCase):
+    @patch('time.sleep')
+    def test_bot_runs_through_recorded_lesson(self, mock_sleep):
+        db_path = os.path.join(DATA_FOLDER, DEFAULT_DB_NAME)
+        db_stat = os.stat(db_path)
+        summary = simulate(rounds=2)
+        # Counted from the question screens the bot got past
+        self.assertEqual(2 * QUESTIONS_PER_LESSON, summary["questions"])
+        self.assertEqual(2 * QUESTIONS_PER_LESSON, summary["stages"]["question"]["count"])
+        self.assertGreater(summary["device_calls"]["dump_hierarchy"], 0)
+        # The bot worked on a scratch copy of the database and log
+        self.assertEqual(db_stat.st_mtime_ns, os.stat(db_path).st_mtime_ns)
+        self.assertFalse(os.path.exists(INCORRECT_ANSWERS_LOG))
+
+
+if __name__ == '__main__':
+    unittest.main()
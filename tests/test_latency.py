@@ -0,0 +1,63 @@
+import json
+import os
+import tempfile
+import unittest
+
+from auto_duolingo.latency import LatencyRecorder, StageHistogram
+
+
+class TestStageHistogram(unittest.TestCase):
+    def test_percentiles_are_interpolated_in_buckets(self):
+        histogram = StageHistogram()
+        for seconds in [0.003] * 9 + [0.4]:
+            histogram.add(seconds)
+
+        self.assertEqual(histogram.count, 10)
+        # Halfway through the nine samples of the 2-5 ms bucket
+        self.assertAlmostEqual(histogram.percentile_ms(0.5), 2 + 3 * 5 / 9)
+        self.assertAlmostEqual(histogram.percentile_ms(0.9), 5)
+        # The 200-500 ms bucket is cut off at the slowest sample
+        self.assertAlmostEqual(histogram.percentile_ms(0.99), 380)
+        self.assertAlmostEqual(histogram.percentile_ms(1.0), 400)
+
+    def test_overflow_bucket(self):
+        histogram = StageHistogram()
+        histogram.add(45.0)
+        self.assertEqual(histogram.to_dict()["buckets_ms"], {">30000": 1})
+
+
+class TestLatencyRecorder(unittest.TestCase):
+    def test_samples_are_attributed_to_question_type(self):
+        recorder = LatencyRecorder()
+        recorder.record("dump", 0.01)
+        with recorder.question("TRANSLATE_SENTENCE"):
+            with recorder.measure("solve"):
+                pass
+
+        summary = recorder.summary()
+        self.assertEqual(set(summary["stages"]), {"dump", "solve", "question"})
+        self.assertEqual(set(summary["question_types"]["TRANSLATE_SENTENCE"]),
+                         {"solve", "question"})
+
+    def test_measure_records_on_error(self):
+        recorder = LatencyRecorder()
+        with self.assertRaises(ValueError):
+            with recorder.measure("solve"):
+                raise ValueError()
+        self.assertEqual(recorder.summary()["stages"]["solve"]["count"], 1)
+
+    def test_write_json(self):
+        recorder = LatencyRecorder()
+        recorder.record("taps", 0.2)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "stats.json")
+            recorder.json_path = path
+            recorder.flush_interval = 0
+            recorder.maybe_flush()
+            with open(path, encoding='utf-8') as file:
+                data = json.load(file)
+        self.assertEqual(data["stages"]["taps"]["count"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
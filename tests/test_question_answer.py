@@ -0,0 +1,47 @@
+import unittest
+
+from auto_duolingo.question_answer import map_options_to_bounds, solve_with_cache
+from auto_duolingo.ui_helper.Bounds import Bounds
+from db.AnswerCache import AnswerCache
+from db.connection import open_connection
+
+
+class TestMapOptionsToBounds(unittest.TestCase):
+    def test_map_in_sorted_order(self):
+        options = [('を', Bounds(0, 0, 10, 10)), ('で', Bounds(10, 0, 20, 10))]
+        self.assertEqual([Bounds(10, 0, 20, 10), Bounds(0, 0, 10, 10)],
+                         map_options_to_bounds(['で', 'を'], options))
+
+    def test_duplicate_options_are_used_once_each(self):
+        options = [('は', Bounds(0, 0, 10, 10)), ('は', Bounds(10, 0, 20, 10))]
+        self.assertEqual([Bounds(0, 0, 10, 10), Bounds(10, 0, 20, 10)],
+                         map_options_to_bounds(['は', 'は', 'は'], options))
+
+    def test_missing_option(self):
+        options = [('を', Bounds(0, 0, 10, 10))]
+        self.assertEqual([], map_options_to_bounds([None], options))
+
+
+class TestSolveWithCache(unittest.TestCase):
+    def setUp(self):
+        self.conn = open_connection(':memory:')
+        self.cache = AnswerCache(conn=self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_second_occurrence_skips_the_solver(self):
+        options = [('狗', Bounds(0, 0, 10, 10)), ('猫咪', Bounds(10, 0, 20, 10))]
+        solved = solve_with_cache('CHOOSE_CORRECT_TRANSLATION', '猫', options,
+                                  lambda: [Bounds(10, 0, 20, 10)], self.cache)
+        self.cache.record_status(solved[1], 'correct')
+        # Options may be shown in another order and place next time
+        options = [('猫咪', Bounds(0, 50, 10, 60)), ('狗', Bounds(10, 50, 20, 60))]
+        cached = solve_with_cache('CHOOSE_CORRECT_TRANSLATION', '猫', options,
+                                  lambda: self.fail("solver called"), self.cache)
+        self.assertEqual([Bounds(0, 50, 10, 60)], cached[0])
+        self.assertEqual(solved[1], cached[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
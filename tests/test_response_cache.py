@@ -0,0 +1,77 @@
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from llm.response_cache import ResponseCache
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.data_folder = tempfile.mkdtemp()
+        self.cache = ResponseCache('test_llm_cache.db', data_folder=self.data_folder)
+        self.calls = []
+
+        @self.cache.cached(lambda: "model-a")
+        def pick(original_word, options, max_attempts=3):
+            self.calls.append(original_word)
+            return options[0] if options else None
+
+        self.pick = pick
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.data_folder)
+
+    def test_identical_inputs_hit(self):
+        self.assertEqual(self.pick("猫", ["ねこ", "いぬ"]), "ねこ")
+        # Width forms, whitespace and ignored arguments do not change the key
+        self.assertEqual(self.pick(" 猫", ["ねこ", "いぬ"], max_attempts=1), "ねこ")
+        self.assertEqual(self.calls, ["猫"])
+        self.assertEqual(self.cache.stats(), {"hits": 1, "misses": 1})
+
+    def test_persists_across_instances(self):
+        self.pick("猫", ["ねこ"])
+        reopened = ResponseCache('test_llm_cache.db', data_folder=self.data_folder)
+        key = reopened.make_key("pick", "model-a", {"original_word": "猫", "options": ["ねこ"]})
+        self.assertEqual(reopened.get(key), "ねこ")
+        reopened.close()
+
+    def test_empty_answers_are_not_cached(self):
+        self.pick("猫", [])
+        self.pick("猫", [])
+        self.assertEqual(len(self.calls), 2)
+
+    def test_invalid_answers_are_not_cached(self):
+        @self.cache.cached(lambda: "model-a",
+                           validate=lambda response, options, **_: response in options)
+        def pick_unlisted(original_word, options):
+            self.calls.append(original_word)
+            return "ねずみ"
+
+        pick_unlisted("猫", ["ねこ"])
+        pick_unlisted("猫", ["ねこ"])
+        self.assertEqual(len(self.calls), 2)
+
+    def test_expired_entries_are_asked_again(self):
+        self.pick("猫", ["ねこ"])
+        with patch("llm.response_cache.time.time", return_value=1e12):
+            self.pick("猫", ["ねこ"])
+        self.assertEqual(len(self.calls), 2)
+
+    def test_least_recently_used_are_evicted(self):
+        self.cache.max_entries = 2
+        now = time.time()
+        self.pick("a", ["1"])
+        self.pick("b", ["2"])
+        with patch("llm.response_cache.time.time", return_value=now + 10):
+            self.pick("a", ["1"])
+        with patch("llm.response_cache.time.time", return_value=now + 20):
+            self.pick("c", ["3"])
+            self.pick("b", ["2"])
+        self.assertEqual(self.calls, ["a", "b", "c", "b"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+from auto_duolingo.constants import ScreenState
+from auto_duolingo.ui_helper.ScreenClassifier import (
+    ScreenClassifier,
+    classify_screen,
+)
+from auto_duolingo.ui_helper.ScreenSnapshot import ScreenSnapshot
+from tests.test_screen_snapshot import load_hierarchy, load_snapshot
+
+
+class TestScreenClassifier(unittest.TestCase):
+    def test_question_screen(self):
+        result = classify_screen(load_snapshot("CHOOSE_CORRECT_TRANSLATION"))
+        self.assertEqual(ScreenState.QUESTION, result.state)
+
+    def test_continue_button_wins_over_question(self):
+        # The no-hearts dialog is shown on top of a question
+        result = classify_screen(load_snapshot("NO_HEARTS"))
+        self.assertEqual(ScreenState.CONTINUE, result.state)
+        self.assertEqual("com.duolingo:id/continueButtonRed",
+                         result.resource_id)
+        self.assertEqual(result.bounds.center, (540, 2247))
+
+    def test_streamed_screen_stops_at_top_continue_button(self):
+        screen = ScreenSnapshot.stream(
+            '<hierarchy>'
+            '<node resource-id="com.duolingo:id/continueButtonGreen" package="com.duolingo" '
+            'bounds="[0,0][100,100]" />'
+            '<node resource-id="com.duolingo:id/title" package="com.duolingo" '
+            'bounds="[0,200][100,300]" />'
+            '</hierarchy>')
+        result = classify_screen(screen)
+        self.assertEqual("com.duolingo:id/continueButtonGreen",
+                         result.resource_id)
+        self.assertFalse(screen.complete)
+
+    def test_streamed_screen_matches_full_parse(self):
+        for name in ["CHOOSE_MATCHING_PAIR", "WRONG", "NO_HEARTS", "tabLeagues"]:
+            streamed = classify_screen(
+                ScreenSnapshot.stream(load_hierarchy(name)))
+            self.assertEqual(classify_screen(load_snapshot(name)), streamed)
+
+    def test_continue_buttons_are_ranked_in_both_paths(self):
+        xml = ('<hierarchy>'
+               '<node resource-id="com.duolingo:id/continueButtonRed" package="com.duolingo" '
+               'bounds="[0,0][100,100]" />'
+               '<node resource-id="com.duolingo:id/continueButtonGreen" package="com.duolingo" '
+               'bounds="[0,200][100,300]" />'
+               '</hierarchy>')
+        for screen in (ScreenSnapshot.from_xml(xml), ScreenSnapshot.stream(xml)):
+            result = classify_screen(screen)
+            self.assertEqual(ScreenState.CONTINUE, result.state)
+            self.assertEqual("com.duolingo:id/continueButtonGreen",
+                             result.resource_id)
+
+    def test_app_not_launched(self):
+        screen = ScreenSnapshot.from_xml(
+            '<hierarchy><node resource-id="" package="com.android.launcher" '
+            'bounds="[0,0][1080,2400]" /></hierarchy>')
+        self.assertEqual(ScreenState.APP_NOT_LAUNCHED,
+                         classify_screen(screen).state)
+
+    def test_unknown(self):
+        self.assertEqual(ScreenState.UNKNOWN,
+                         classify_screen(load_snapshot("tabLeagues")).state)
+
+    def test_register_rule(self):
+        classifier = ScreenClassifier()
+        classifier.register(ScreenState.UNIT_SELECTION,
+                            ["com.duolingo:id/tabLeagues"])
+        result = classifier.classify(load_snapshot("tabLeagues"))
+        self.assertEqual(ScreenState.UNIT_SELECTION, result.state)
+        self.assertEqual("com.duolingo:id/tabLeagues", result.resource_id)
+
+    def test_register_rule_with_priority(self):
+        classifier = ScreenClassifier()
+        classifier.register(ScreenState.NO_HEARTS,
+                            ["com.duolingo:id/noHeartsTitle"], priority=0)
+        result = classifier.classify(load_snapshot("NO_HEARTS"))
+        self.assertEqual(ScreenState.NO_HEARTS, result.state)
+
+
+if __name__ == '__main__':
+    unittest.main()
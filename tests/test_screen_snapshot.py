@@ -0,0 +1,119 @@
+import os
+import unittest
+
+from auto_duolingo.constants import QuestionType
+from auto_duolingo.ui_helper.ScreenSnapshot import ScreenSnapshot
+from auto_duolingo.ui_helper.ui_info_extractor import (
+    detect_question_type,
+    extract_alternative_options,
+    extract_flashcard_text,
+    extract_matching_pairs,
+    extract_origin_sentence,
+    get_answer_status,
+    is_app_launched,
+    is_in_question_screen,
+)
+
+HIERARCHY_DIR = os.path.join(
+    os.path.dirname(__file__), '..', 'assets', 'hierarchy')
+
+
+def load_hierarchy(name: str) -> str:
+    path = os.path.join(HIERARCHY_DIR, f"hierarchy_{name}.xml")
+    with open(path, 'r', encoding='utf-8') as file:
+        return file.read()
+
+
+def load_snapshot(name: str) -> ScreenSnapshot:
+    return ScreenSnapshot.from_xml(load_hierarchy(name))
+
+
+class TestScreenSnapshot(unittest.TestCase):
+    def test_index_by_resource_id(self):
+        snapshot = load_snapshot("TRANSLATE_JPN_TO_CHI")
+        self.assertTrue(snapshot.has("com.duolingo:id/submitButton"))
+        self.assertFalse(snapshot.has("com.duolingo:id/noHeartsTitle"))
+        self.assertEqual(
+            7, len(snapshot.findall("com.duolingo:id/optionText")))
+        self.assertEqual("値段が上がりました。", snapshot.text_of(
+            "com.duolingo:id/hintablePrompt"))
+
+    def test_descendants_of_container(self):
+        snapshot = load_snapshot("TRANSLATE_JPN_TO_CHI")
+        guess = snapshot.find("com.duolingo:id/guessContainer")
+        options = snapshot.find("com.duolingo:id/optionsContainer")
+        self.assertEqual(3, len(snapshot.findall_in(
+            guess, "com.duolingo:id/optionText")))
+        self.assertEqual(4, len(snapshot.findall_in(
+            options, "com.duolingo:id/optionText")))
+
+    def test_parent(self):
+        snapshot = load_snapshot("HOW_TO_PRONOUNCE")
+        self.assertIsNone(snapshot.parent(snapshot.root))
+        character = snapshot.find("com.duolingo:id/character")
+        self.assertIn(character, list(snapshot.parent(character)))
+
+    def test_packages(self):
+        snapshot = load_snapshot("CHOOSE_MATCHING_PAIR")
+        self.assertTrue(snapshot.has_package("com.android.systemui"))
+        self.assertTrue(is_app_launched(snapshot))
+
+
+class TestStreamedScreenSnapshot(unittest.TestCase):
+    def test_scan_until_stops_early(self):
+        snapshot = ScreenSnapshot.stream(load_hierarchy("NO_HEARTS"))
+        element = snapshot.scan_until({"com.duolingo:id/continueButtonRed"})
+        self.assertEqual("com.duolingo:id/continueButtonRed",
+                         element.get("resource-id"))
+        self.assertFalse(snapshot.complete)
+
+    def test_scan_until_missing_id_reads_everything(self):
+        snapshot = ScreenSnapshot.stream(load_hierarchy("tabLeagues"))
+        self.assertIsNone(snapshot.scan_until({"com.duolingo:id/nothing"}))
+        self.assertTrue(snapshot.complete)
+
+    def test_queries_finish_the_parse(self):
+        xml = load_hierarchy("TRANSLATE_JPN_TO_CHI")
+        streamed = ScreenSnapshot.stream(xml)
+        streamed.scan_until({"com.duolingo:id/challengeInstruction"})
+        full = ScreenSnapshot.from_xml(xml)
+        self.assertEqual(list(full.resource_ids()),
+                         list(streamed.resource_ids()))
+        self.assertTrue(streamed.complete)
+        options = streamed.find("com.duolingo:id/optionsContainer")
+        self.assertEqual(4, len(streamed.findall_in(
+            options, "com.duolingo:id/optionText")))
+
+
+class TestUIInfoExtractor(unittest.TestCase):
+    def test_translate_sentence(self):
+        snapshot = load_snapshot("TRANSLATE_JPN_TO_CHI")
+        self.assertTrue(is_in_question_screen(snapshot))
+        self.assertEqual(QuestionType.TRANSLATE_SENTENCE,
+                         detect_question_type(snapshot))
+        self.assertEqual("値段が上がりました。", extract_origin_sentence(snapshot))
+        options = [text for text, _ in extract_alternative_options(snapshot)]
+        self.assertEqual(['了', '涨', '平时', '和'], options)
+
+    def test_matching_pairs(self):
+        snapshot = load_snapshot("CHOOSE_MATCHING_PAIR")
+        words, options = extract_matching_pairs(snapshot)
+        self.assertEqual(5, len(words))
+        self.assertEqual(5, len(options))
+        self.assertEqual('截止日期', words[0][0])
+
+    def test_flashcard_text(self):
+        snapshot = load_snapshot("HOW_TO_PRONOUNCE")
+        self.assertEqual(QuestionType.HOW_TO_PRONOUNCE,
+                         detect_question_type(snapshot))
+        self.assertEqual('貧しい', extract_flashcard_text(snapshot))
+
+    def test_answer_status_incorrect(self):
+        snapshot = load_snapshot("WRONG")
+        result = get_answer_status(snapshot)
+        self.assertEqual("incorrect", result["status"])
+        self.assertEqual("いやな仕事からうまく逃げました。", result["original_sentence"])
+
+
+if __name__ == '__main__':
+    unittest.main()
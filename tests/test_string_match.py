@@ -1,6 +1,13 @@
+import time
 import unittest
+from collections import Counter
 
-from auto_duolingo.string_util import sort_substrings
+from auto_duolingo.string_util import (
+    AhoCorasick,
+    bounded_levenshtein,
+    is_valid_sort,
+    sort_substrings,
+)
 
 
 class TestSortSubstrings(unittest.TestCase):
@@ -64,6 +71,78 @@ class TestSortSubstrings(unittest.TestCase):
         expected = (['把', '书', '放在', '书桌上', '了'], '')
         self.assertEqual(expected, sort_substrings(sentence, substrings))
 
+    def test_tiles_are_used_as_often_as_given(self):
+        sentence = "りんごりんごとバナナ"
+        substrings = ['りんご', 'バナナ']
+        expected = (['りんご', 'バナナ'], 'りんごと')
+        self.assertEqual(expected, sort_substrings(sentence, substrings))
+
+    def test_long_tile_does_not_block_a_full_cover(self):
+        sentence = "书桌上的书桌"
+        substrings = ['书桌', '书', '桌上', '的', '桌']
+        expected = (['书', '桌上', '的', '书桌'], '')
+        self.assertEqual(expected, sort_substrings(sentence, substrings))
+
+    def test_duplicate_tiles(self):
+        sentence = "わたしはねこはすきです"
+        substrings = ['は', 'わたし', 'すき', 'は', 'です', 'ねこ', 'はね']
+        expected = (['わたし', 'は', 'ねこ', 'は', 'すき', 'です'], '')
+        self.assertEqual(expected, sort_substrings(sentence, substrings))
+
+    def test_repeated_question_returns_a_fresh_list(self):
+        first, _ = sort_substrings("りんごとバナナ", ['バナナ', 'りんご'])
+        first.append('メロン')
+        self.assertEqual((['りんご', 'バナナ'], 'と'),
+                         sort_substrings("りんごとバナナ", ['りんご', 'バナナ']))
+
+    def test_many_single_character_tiles_are_fast(self):
+        sentence = "我们今天下午在图书馆里一起学习中文和日语因为明天有考试"
+        substrings = list(sentence[:25])
+        start = time.perf_counter()
+        result, unmatched = sort_substrings(sentence, substrings)
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertEqual(list(sentence[:25]), result)
+        self.assertEqual(sentence[25:], unmatched)
+
+    def test_search_is_bounded(self):
+        # Repeated characters and a few longer tiles defeat the greedy pass
+        sentence = "ははのはなははなはははなのはなははのはなはははな"
+        substrings = list("はははははははのなななのは") + ['はな', 'のは', 'はは', 'ははな', 'なは'] * 2
+        start = time.perf_counter()
+        result, unmatched = sort_substrings(sentence, substrings)
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertEqual('', unmatched)
+        self.assertEqual(sentence, ''.join(result))
+        self.assertFalse(Counter(result) - Counter(substrings))
+
+    def test_is_valid_sort(self):
+        substrings = ['猫', '我', '喜欢', '狗']
+        self.assertTrue(is_valid_sort(['我', '喜欢', '猫'], substrings))
+        self.assertFalse(is_valid_sort(['我', '爱', '猫'], substrings))
+        # Each tile is given once
+        self.assertFalse(is_valid_sort(['猫', '猫'], substrings))
+        self.assertFalse(is_valid_sort([], substrings))
+
+
+class TestAhoCorasick(unittest.TestCase):
+    def test_overlapping_occurrences(self):
+        matches = sorted(AhoCorasick(['书', '书桌', '桌上', '']).find_all("书桌上"))
+        self.assertEqual([(0, '书'), (0, '书桌'), (1, '桌上')], matches)
+
+    def test_repeated_pattern(self):
+        self.assertEqual([(0, 'ああ'), (1, 'ああ')],
+                         list(AhoCorasick(['ああ']).find_all("あああ")))
+
+
+class TestBoundedLevenshtein(unittest.TestCase):
+    def test_within_bound(self):
+        self.assertEqual(bounded_levenshtein("kitten", "sitting", 3), 3)
+        self.assertEqual(bounded_levenshtein("同じ", "同じ", 0), 0)
+
+    def test_beyond_bound(self):
+        self.assertIsNone(bounded_levenshtein("kitten", "sitting", 2))
+        self.assertIsNone(bounded_levenshtein("a", "abcd", 2))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+
+from db.WordGraph import WordGraph
+
+
+class TestWordGraph(unittest.TestCase):
+    def setUp(self):
+        # 猫 and 貓 are only linked through their reading
+        self.graph = WordGraph([('ねこ', '猫'), ('ねこ', '貓'), ('いぬ', '犬')])
+
+    def test_direct_matches_first(self):
+        matches = self.graph.find_matches(['ねこ', 'いぬ'], ['犬', '貓', '猫'])
+        self.assertEqual(matches, {'ねこ': '貓', 'いぬ': '犬'})
+
+    def test_two_hop_match(self):
+        matches = self.graph.find_matches(['猫', 'いぬ', 'とり'], ['犬', '貓'])
+        self.assertEqual(matches, {'猫': '貓', 'いぬ': '犬', 'とり': None})
+
+    def test_two_hop_skips_taken_options(self):
+        matches = self.graph.find_matches(['猫', 'ねこ'], ['貓'])
+        self.assertEqual(matches, {'猫': None, 'ねこ': '貓'})
+
+    def test_max_hops(self):
+        graph = WordGraph([('a', 'b'), ('b', 'c'), ('c', 'd')], max_hops=2)
+        self.assertEqual(graph.find_matches(['a'], ['d']), {'a': None})
+        self.assertEqual(graph.find_matches(['a'], ['c']), {'a': 'c'})
+
+    def test_add_pair_updates_reach(self):
+        self.graph.add_pair('いぬ', 'inu')
+        self.assertEqual(self.graph.find_matches(['犬'], ['inu']), {'犬': 'inu'})
+        self.assertEqual(len(self.graph), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
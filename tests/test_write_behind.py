@@ -0,0 +1,62 @@
+import threading
+import unittest
+
+from auto_duolingo.write_behind import WriteBehind
+
+
+class RecordingDatabases:
+    """Stands in for a ConnectionManager, recording each batch written."""
+
+    def __init__(self):
+        self.batches = []
+        self.thread = None
+        self.closed = False
+
+    def sentence_pair_db(self):
+        return self
+
+    def insert_many(self, sentence_pairs):
+        self.thread = threading.current_thread()
+        self.batches.append(list(sentence_pairs))
+
+    def close(self):
+        self.closed = True
+
+
+class TestWriteBehind(unittest.TestCase):
+    def setUp(self):
+        self.databases = RecordingDatabases()
+        self.writer = WriteBehind(lambda: self.databases, flush_interval=60)
+
+    def tearDown(self):
+        self.writer.close()
+
+    def test_writes_are_batched_on_the_writer_thread(self):
+        self.writer.insert_sentence_pair("はい。", "是的。")
+        self.writer.insert_sentence_pair("いいえ。", "不是。")
+        self.assertTrue(self.writer.flush(timeout=5))
+        self.assertEqual(self.databases.batches,
+                         [[("はい。", "是的。", ""), ("いいえ。", "不是。", "")]])
+        self.assertIsNot(self.databases.thread, threading.current_thread())
+
+    def test_calls_run_in_order(self):
+        calls = []
+        self.writer.call(calls.append, 1)
+        self.writer.call(calls.append, 2)
+        self.writer.flush(timeout=5)
+        self.assertEqual(calls, [1, 2])
+
+    def test_close_writes_pending_pairs(self):
+        self.writer.insert_sentence_pair("はい。", "是的。")
+        self.writer.close()
+        self.assertEqual(self.databases.batches, [[("はい。", "是的。", "")]])
+        self.assertTrue(self.databases.closed)
+
+    def test_databases_are_opened_only_for_pairs(self):
+        writer = WriteBehind(lambda: self.fail("databases opened"))
+        writer.call(len, "x")
+        writer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
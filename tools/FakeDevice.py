@@ -0,0 +1,166 @@
+import os
+import re
+import time
+from collections import Counter
+from typing import Collection, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from auto_duolingo.ui_helper.Bounds import Bounds
+from auto_duolingo.ui_helper.ScreenSnapshot import ScreenSnapshot
+
+HIERARCHY_DIR = os.path.join(
+    os.path.dirname(__file__), '..', 'assets', 'hierarchy')
+
+
+def load_hierarchy(name: str) -> str:
+    """Read assets/hierarchy/hierarchy_<name>.xml."""
+    path = os.path.join(HIERARCHY_DIR, f"hierarchy_{name}.xml")
+    with open(path, 'r', encoding='utf-8') as file:
+        return file.read()
+
+
+class FakeScreen(NamedTuple):
+    xml: str
+    # Taps on nodes with these resource-ids move the script forward
+    advance_on: Collection[str] = ()
+    # How many such taps it takes
+    taps_needed: int = 1
+
+
+class ScriptFinished(Exception):
+    """Raised when a non-looping script has no screen left to show."""
+
+
+class FakeSelector:
+    def __init__(self, device: "FakeDevice", resourceId: Optional[str] = None, text: Optional[str] = None):
+        self._device = device
+        self._resource_id = resourceId
+        self._text = text
+
+    def _element(self):
+        screen = self._device.current_snapshot()
+        candidates = screen.findall(
+            self._resource_id) if self._resource_id else list(screen.root.iter())
+        for element in candidates:
+            if self._text is None or element.get("text") == self._text:
+                return element
+        return None
+
+    @property
+    def exists(self) -> bool:
+        self._device._record("exists")
+        return self._element() is not None
+
+    def wait(self, timeout: float = 10.0) -> bool:
+        # Screens only change on taps, so there is nothing to wait for
+        self._device._record("wait")
+        return self._element() is not None
+
+    def click(self, timeout: Optional[float] = None):
+        self._device._record("selector_click")
+        element = self._element()
+        if element is None:
+            raise LookupError(
+                f"UiObject not found: resourceId={self._resource_id}, text={self._text}")
+        self._device._tap(*Bounds.from_str(element.get("bounds")).center)
+
+
+class FakeShellResponse(NamedTuple):
+    output: str
+    exit_code: int
+
+
+class FakeDevice:
+    """
+    Stands in for a uiautomator2 device, serving a scripted sequence of
+    recorded hierarchies. Implements the part of the API DuolingoUIHelper
+    uses: dump_hierarchy, click, app_start, shell (for `input tap` scripts)
+    and selectors with exists/wait/click.
+
+    `latency` adds a delay to every call, either one value for all calls or
+    per method name; `time_scale` scales those delays and on-device sleeps.
+    """
+
+    def __init__(self, script: List[FakeScreen], loop: bool = False,
+                 latency: Union[float, Dict[str, float]] = 0.0, time_scale: float = 1.0):
+        if not script:
+            raise ValueError("The script needs at least one screen.")
+        self.script = script
+        self.loop = loop
+        self.latency = latency
+        self.time_scale = time_scale
+        self.position = 0
+        self.screens_shown = 1
+        self.taps: List[Tuple[int, int]] = []
+        self.calls: Counter = Counter()
+        self.started_packages: List[str] = []
+        self._advance_taps = 0
+        self._snapshots: Dict[int, ScreenSnapshot] = {}
+
+    def _record(self, name: str):
+        self.calls[name] += 1
+        delay = self.latency.get(name, 0.0) if isinstance(
+            self.latency, dict) else self.latency
+        if delay:
+            time.sleep(delay * self.time_scale)
+
+    def _current(self) -> FakeScreen:
+        if self.position >= len(self.script):
+            raise ScriptFinished()
+        return self.script[self.position]
+
+    def current_snapshot(self) -> ScreenSnapshot:
+        if self.position not in self._snapshots:
+            self._snapshots[self.position] = ScreenSnapshot.from_xml(
+                self._current().xml)
+        return self._snapshots[self.position]
+
+    def _tap(self, x: int, y: int):
+        self.taps.append((x, y))
+        screen = self._current()
+        snapshot = self.current_snapshot()
+        hit = any(
+            Bounds.from_str(element.get("bounds")).contains(x, y)
+            for resource_id in screen.advance_on
+            for element in snapshot.findall(resource_id))
+        if not hit:
+            return
+        self._advance_taps += 1
+        if self._advance_taps >= screen.taps_needed:
+            self._advance()
+
+    def _advance(self):
+        self._advance_taps = 0
+        self.position += 1
+        self.screens_shown += 1
+        if self.loop and self.position >= len(self.script):
+            self.position = 0
+
+    def __call__(self, resourceId: Optional[str] = None, text: Optional[str] = None) -> FakeSelector:
+        return FakeSelector(self, resourceId=resourceId, text=text)
+
+    def dump_hierarchy(self) -> str:
+        self._record("dump_hierarchy")
+        return self._current().xml
+
+    def click(self, x: int, y: int):
+        self._record("click")
+        self._tap(x, y)
+
+    def app_start(self, package_name: str):
+        self._record("app_start")
+        self.started_packages.append(package_name)
+
+    def shell(self, cmdargs: str, timeout: float = 60) -> FakeShellResponse:
+        """Run `input tap x y` and `sleep s` commands; anything else fails."""
+        self._record("shell")
+        for command in cmdargs.split(";"):
+            command = command.strip()
+            tap = re.fullmatch(r"input tap (\d+) (\d+)", command)
+            sleep = re.fullmatch(r"sleep ([\d.]+)", command)
+            if tap:
+                self._tap(int(tap.group(1)), int(tap.group(2)))
+            elif sleep:
+                time.sleep(float(sleep.group(1)) * self.time_scale)
+            elif command:
+                return FakeShellResponse(f"{command}: not found", 127)
+        return FakeShellResponse("", 0)